@@ -43,6 +43,7 @@ def main():
             start = time.time()
             while not TG.in_precise_timing_mode() and int(((time.time() - start) / 60)) < AWAITING_FOR_PRECISE_TIMING_IN_MINUTES:
                 time.sleep(1)
+                print_survey_progress(TG.survey_progress())
 
             # 5. Summary
             if TG.in_precise_timing_mode():
@@ -71,6 +72,16 @@ def main():
             print('External signal wasn\'t reported as active.')
 
 
+def print_survey_progress(progress):
+    if progress['progress'] is None:
+        return
+    eta = 'unknown'
+    if progress['eta_sec'] is not None:
+        eta = str(int(progress['eta_sec'])) + 's'
+    print('Self survey progress: ' + str(int(progress['progress'] * 100)) +
+          '% (ETA: ' + eta + ').')
+
+
 def configure_logging():
     logging.basicConfig(level=logging.DEBUG)
 
@@ -0,0 +1,291 @@
+"""
+Concurrency stress harness for TimingGnss.
+
+Several high-rate FurunoSimulators are served by TimingGnss instances while N API
+threads keep calling `in_precise_timing_mode()`, `ext_signal_is_set()`, snapshot getters
+and `write()` against all of them. The harness checks that:
+    - snapshot versions never go backwards,
+    - every observed data mapping matches one emitted sentence (no torn updates),
+    - no queued write is lost (simulators count received commands),
+and reports how long API callers wait (lock convoying shows up as latency outliers)
+together with the serial reader resynchronization time (time to the first line after
+the port is opened and after a pause/resume cycle).
+Waits may be bounded (p99) to turn convoying into an error.
+
+Run from the repository root:
+    python -m tests.stress_concurrency --simulators 4 --threads 8 --duration 10
+
+A short run is a part of the test suite (test_stress_concurrency.py).
+
+"""
+import argparse
+import itertools
+import logging
+import random
+import sys
+import time
+from threading import Thread, Event, Lock
+
+from timinggnss.timinggnss import TimingGnss
+from timinggnss.simulators.furuno_simulator import FurunoSimulator
+from timinggnss.common.enums import PositionMode
+
+DRAIN_TIMEOUT_SEC = 10
+
+
+class Target:
+    """
+    Simulator, its TimingGnss and everything written to the simulator so far.
+
+    Settings are registered before being written so any value the receiver reports
+    has to be found among them.
+
+    """
+
+    def __init__(self, simulator, timing_gnss):
+        self.simulator = simulator
+        self.timing_gnss = timing_gnss
+        self.writes = 0
+        self.writes_mutex = Lock()
+        # initial HW adapter data and simulator state
+        self.survey_settings = {(0, 0)}
+        self.ext_signal_settings = {(False, 0, 0, 0)}
+
+        # writes done by the library itself are counted as well
+        timing_gnss.gnss.tx_data = self.__counted(timing_gnss.gnss.tx_data)
+        scheduler = timing_gnss.status_query_scheduler
+        scheduler.tx_data = self.__counted(scheduler.tx_data)
+
+    def write(self, data):
+        self.count_write()
+        self.timing_gnss.write(data)
+
+    def count_write(self):
+        with self.writes_mutex:
+            self.writes += 1
+
+    def __counted(self, tx_data):
+        def counted_tx_data(data):
+            if data:
+                self.count_write()
+            tx_data(data)
+        return counted_tx_data
+
+
+class Worker(Thread):
+    """
+    API user - calls the API in a loop and checks every observed snapshot.
+
+    """
+
+    def __init__(self, targets, stop_event, write_interval_sec, frequencies, seed):
+        Thread.__init__(self, daemon=True)
+        self.targets = targets
+        self.stop_event = stop_event
+        self.write_interval_sec = write_interval_sec
+        self.frequencies = frequencies
+        self.random = random.Random(seed)
+        self.latencies = {name: [] for name in (
+            'in_precise_timing_mode', 'ext_signal_is_set', 'get_position_mode_snapshot',
+            'get_ext_signal_snapshot', 'write')}
+        self.errors = []
+        self.last_versions = dict()
+
+    def run(self):
+        next_write = time.monotonic()
+        while not self.stop_event.is_set():
+            for index, target in enumerate(self.targets):
+                tg = target.timing_gnss
+                self.__timed('in_precise_timing_mode', tg.in_precise_timing_mode)
+                self.__timed('ext_signal_is_set', tg.ext_signal_is_set)
+                position_mode = self.__timed('get_position_mode_snapshot', tg.gnss.get_position_mode_snapshot)
+                ext_signal = self.__timed('get_ext_signal_snapshot', tg.gnss.get_ext_signal_snapshot)
+                self.__check_position_mode(index, target, position_mode)
+                self.__check_ext_signal(index, target, ext_signal)
+
+            if time.monotonic() >= next_write:
+                next_write += self.write_interval_sec
+                self.__write_settings(self.random.choice(self.targets))
+
+    def __write_settings(self, target):
+        hw = target.timing_gnss.gnss.hw
+        if self.random.random() < 0.5:
+            # unique frequency so each setting (and its reply) is distinguishable
+            setting = (True, next(self.frequencies), self.random.randint(10, 90), self.random.randint(0, 99))
+            target.ext_signal_settings.add(setting)
+            message = hw.get_ext_signal_enable_message(*setting[1:])
+        else:
+            # survey never ends within the run (at least 1000 minutes)
+            setting = (self.random.randint(0, 255), self.random.randint(1000, 10080))
+            target.survey_settings.add(setting)
+            message = hw.get_position_mode_set_message(
+                PositionMode.SELF_SURVEY, sigma_threshold=setting[0], time_threshold=setting[1])
+        self.__timed('write', target.write, message)
+        self.__timed('write', target.write, hw.get_ext_signal_status_message())
+
+    def __check_position_mode(self, index, target, snapshot):
+        version, data = snapshot
+        self.__check_version(('position_mode', index), version)
+        setting = (data['sigma_threshold'], data['time_threshold'])
+        # before any survey command the receiver is in navigation mode (not defined until reported)
+        expected_modes = (PositionMode.NOT_DEFINED, PositionMode.NAVIGATION) if setting == (0, 0) \
+            else (PositionMode.SELF_SURVEY,)
+        if setting not in target.survey_settings or data['mode'] not in expected_modes or \
+                data['position_updates'] > data['time_threshold'] * 60:
+            self.errors.append('torn position mode update on simulator %d: %s' % (index, dict(data)))
+
+    def __check_ext_signal(self, index, target, snapshot):
+        version, data = snapshot
+        self.__check_version(('ext_signal', index), version)
+        setting = (data['enabled'], data['frequency'], data['duty'], data['offset'])
+        if setting not in target.ext_signal_settings:
+            self.errors.append('torn ext signal update on simulator %d: %s' % (index, dict(data)))
+
+    def __check_version(self, key, version):
+        last_version = self.last_versions.get(key, 0)
+        if version < last_version:
+            self.errors.append('%s version went backwards: %d -> %d' % (key, last_version, version))
+        self.last_versions[key] = version
+
+    def __timed(self, name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.latencies[name].append(time.perf_counter() - start)
+        return result
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def report_latencies(workers, max_p99_latency_sec=None):
+    errors = []
+    print('%-28s %10s %10s %10s %10s' % ('API call wait [us]', 'calls', 'p50', 'p99', 'max'))
+    for name in workers[0].latencies:
+        values = sorted(itertools.chain.from_iterable(worker.latencies[name] for worker in workers))
+        if values:
+            p99 = percentile(values, 0.99)
+            print('%-28s %10d %10.1f %10.1f %10.1f' % (
+                name, len(values), percentile(values, 0.5) * 1e6, p99 * 1e6, values[-1] * 1e6))
+            if max_p99_latency_sec is not None and p99 > max_p99_latency_sec:
+                errors.append('%s p99 wait %.1f us exceeds %.1f us' % (name, p99 * 1e6, max_p99_latency_sec * 1e6))
+    return errors
+
+
+def check_writes(targets):
+    errors = []
+    for index, target in enumerate(targets):
+        target.timing_gnss.status_query_scheduler.stop()
+        # queued data is sent and read by the simulator within a while
+        deadline = time.monotonic() + DRAIN_TIMEOUT_SEC
+        while target.simulator.commands_received < target.writes and time.monotonic() < deadline:
+            time.sleep(0.05)
+        received = target.simulator.commands_received
+        print('simulator %d: %d writes, %d commands received' % (index, target.writes, received))
+        if received != target.writes:
+            errors.append('simulator %d lost %d writes' % (index, target.writes - received))
+    return errors
+
+
+def report_time_to_first_line(targets, stage):
+    errors = []
+    for index, target in enumerate(targets):
+        serial_thread = target.timing_gnss.serial_thread
+        deadline = time.monotonic() + DRAIN_TIMEOUT_SEC
+        while serial_thread.time_to_first_line is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time_to_first_line = serial_thread.time_to_first_line
+        if time_to_first_line is None:
+            errors.append('simulator %d: no line after %s' % (index, stage))
+        else:
+            print('simulator %d: time to first line after %s %.1f ms' % (index, stage, time_to_first_line * 1e3))
+    return errors
+
+
+def resync(targets):
+    # stream is joined at an arbitrary point so the reader has to find a sentence start
+    for target in targets:
+        target.timing_gnss.serial_thread.pause()
+    time.sleep(0.2)
+    for target in targets:
+        target.timing_gnss.serial_thread.resume()
+    return report_time_to_first_line(targets, 'resume')
+
+
+def run(simulators=4, threads=8, duration_sec=10, rate_hz=50, baudrate=115200, write_interval_sec=0.05, seed=1,
+        max_p99_latency_sec=None):
+    """
+    Run the stress test.
+
+    Args:
+        max_p99_latency_sec (float, optional): API call wait (99th percentile) considered an error. Defaults to no limit.
+
+    Returns:
+        list: Detected errors (empty when all checks passed).
+
+    """
+    targets = []
+    try:
+        for index in range(simulators):
+            simulator = FurunoSimulator(baudrate, tps3_rate_hz=rate_hz, gsa_rate_hz=rate_hz, seed=seed + index)
+            simulator.start()
+            timing_gnss = TimingGnss(simulator.port, baudrate)
+            targets.append(Target(simulator, timing_gnss))
+            timing_gnss.__enter__()
+
+        # detection takes a while so all receivers are detected at once
+        detected = dict()
+        detectors = [Thread(target=lambda target=target: detected.__setitem__(target, target.timing_gnss.init()))
+                     for target in targets]
+        for detector in detectors:
+            detector.start()
+        for detector in detectors:
+            detector.join()
+        if not all(detected.values()):
+            return ['receiver not detected']
+        errors = report_time_to_first_line(targets, 'open')
+
+        stop_event = Event()
+        frequencies = itertools.count(10)
+        workers = [Worker(targets, stop_event, write_interval_sec, frequencies, seed + index)
+                   for index in range(threads)]
+        for worker in workers:
+            worker.start()
+        time.sleep(duration_sec)
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+
+        errors += itertools.chain.from_iterable(worker.errors for worker in workers)
+        errors += report_latencies(workers, max_p99_latency_sec)
+        errors += check_writes(targets)
+        return errors + resync(targets)
+    finally:
+        for target in targets:
+            target.timing_gnss.__exit__(None, None, None)
+            target.simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TimingGnss concurrency stress test.')
+    parser.add_argument('--simulators', type=int, default=4, help='number of simulated receivers')
+    parser.add_argument('--threads', type=int, default=8, help='number of API threads')
+    parser.add_argument('--duration', type=float, default=10, help='test duration in seconds')
+    parser.add_argument('--rate', type=float, default=50, help='TPS3 and GSA rate of each simulator in Hz')
+    parser.add_argument('--baudrate', type=int, default=115200, help='simulated baud rate')
+    parser.add_argument('--write-interval', type=float, default=0.05, help='seconds between writes of each thread')
+    parser.add_argument('--seed', type=int, default=1, help='random seed')
+    parser.add_argument('--max-p99-latency', type=float, default=None, help='API call wait limit (99th percentile) in seconds')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    errors = run(args.simulators, args.threads, args.duration, args.rate, args.baudrate, args.write_interval, args.seed,
+                 args.max_p99_latency)
+    for error in errors[:20]:
+        print('ERROR: ' + error)
+    print('FAILED (%d errors)' % len(errors) if errors else 'PASSED')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
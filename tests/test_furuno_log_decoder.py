@@ -0,0 +1,121 @@
+import random
+from types import MappingProxyType
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from timinggnss.offline.furuno_log_decoder import decode  # noqa: E402
+from timinggnss.receivers.hw_adapter_furuno import HwAdapterFuruno  # noqa: E402
+
+
+def checksum(data):
+    result = 0
+    for byte in data:
+        result ^= ord(byte)
+    return result
+
+
+def generate_log(seed, lines_count, garbage_probability):
+    rnd = random.Random(seed)
+    lines = []
+    for index in range(lines_count):
+        kind = rnd.random()
+        if kind < 0.4:
+            data = 'PERDCRY,TPS3,%s,0,%d,%d,%d,0,0,0,%s' % (
+                rnd.choice(['0', '1', '2', '3', '7', '-1', '+2', '03']), rnd.randint(0, 9), index,
+                rnd.randint(0, 99), rnd.choice(['0x1f', '0X2', '0', '12', '012', '0xg', ' 5', '0x', '0xAbC']))
+        elif kind < 0.8:
+            data = 'GNGSA,A,%d,' % rnd.randint(0, 4) + ',' * 12 + '1.5,0.9,1.2,1'
+        elif kind < 0.9:
+            data = 'PERDAPI,FREQ,%d,%d,50,0' % (rnd.randint(0, 2), rnd.randint(10, 10**7))
+        else:
+            data = 'GNRMC,123519,A,4807.038,N,01131.000,E'
+
+        crc = checksum(data)
+        variant = rnd.random()
+        if variant < 0.05:
+            crc ^= 1
+        elif variant < 0.06:
+            data += ',1'
+            crc = checksum(data)
+        prefix = 'xy' if variant > 1 - garbage_probability else ''
+        lines.append(prefix + '$' + data + '*%02X\r' % crc)
+    return lines
+
+
+def decode_online(line):
+    # fresh adapter with sentinel data so any decoded sentence is visible
+    hw = HwAdapterFuruno()
+    hw.position_mode_snapshot = (0, MappingProxyType(
+        dict(hw.get_position_mode_data(), mode=None, fix=None)))
+    hw.ext_signal_snapshot = (0, MappingProxyType(dict(hw.get_ext_signal_data(), enabled=None)))
+    try:
+        hw.process(line)
+    except ValueError:
+        pass
+
+    position_mode = hw.get_position_mode_data()
+    ext_signal = hw.get_ext_signal_data()
+    result = []
+    if position_mode['mode'] is not None:
+        result.append(('tps3', (position_mode['mode'].value, position_mode['sigma_threshold'],
+                                position_mode['position_updates'], position_mode['time_threshold'],
+                                position_mode['receiver_status'])))
+    if position_mode['fix'] is not None:
+        fix = position_mode['fix'].value
+        result.append(('gsa', (fix[0] if isinstance(fix, tuple) else fix,)))
+    if ext_signal['enabled'] is not None:
+        result.append(('freq', (ext_signal['enabled'], ext_signal['frequency'],
+                                ext_signal['duty'], ext_signal['offset'])))
+    return result
+
+
+def expected_rows(lines):
+    expected = {'tps3': [], 'gsa': [], 'freq': []}
+    for line in lines:
+        for name, values in decode_online(line):
+            expected[name].append(values)
+    return expected
+
+
+def decoded_rows(decoded):
+    return {
+        'tps3': [tuple(int(value) for value in row) for row in
+                 decoded['tps3'][['mode', 'sigma_threshold', 'position_updates', 'time_threshold', 'receiver_status']]],
+        'gsa': [(int(row),) for row in decoded['gsa']['fix']],
+        'freq': [(bool(row[0]), int(row[1]), int(row[2]), int(row[3])) for row in
+                 decoded['freq'][['enabled', 'frequency', 'duty', 'offset']]]
+    }
+
+
+@pytest.mark.parametrize('garbage_probability', [0, 0.001, 0.05])
+def test_decode_matches_online_decoder(garbage_probability):
+    lines = generate_log(1, 20000, garbage_probability)
+    log = ('\n'.join(lines) + '\n').encode()
+
+    decoded = decode(log, chunk_size=64 * 1024)
+
+    assert decoded_rows(decoded) == expected_rows(lines)
+
+
+def test_decode_skips_values_out_of_int64_range():
+    data = 'PERDCRY,TPS3,1,0,5,1,10,0,0,0,' + '9' * 25
+    valid = 'PERDCRY,TPS3,1,0,5,2,10,0,0,0,0x00'
+    log = ('$%s*%02X\r\n$%s*%02X\r\n' % (data, checksum(data), valid, checksum(valid))).encode()
+
+    decoded = decode(log)
+
+    assert list(decoded['tps3']['position_updates']) == [2]
+
+
+def test_decode_byte_offsets_point_to_lines():
+    lines = generate_log(2, 2000, 0.01)
+    log = ('\n'.join(lines) + '\n').encode()
+
+    decoded = decode(log, chunk_size=4096)
+
+    for name, keyword in (('tps3', b'PERDCRY,TPS3'), ('gsa', b'GNGSA,A'), ('freq', b'PERDAPI,FREQ')):
+        for offset in decoded[name]['byte_offset']:
+            assert offset == 0 or log[offset - 1:offset] == b'\n'
+            assert keyword in log[offset:log.index(b'\n', offset)]
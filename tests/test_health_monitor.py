@@ -0,0 +1,123 @@
+from types import MappingProxyType
+
+from timinggnss.common.enums import ExtSignalHealth, PositionMode, PositionFixMode
+from timinggnss.health_monitor import ExtSignalHealthMonitor
+
+
+def position_mode(mode=PositionMode.TIME_ONLY, fix=PositionFixMode.FIX_3D):
+    return MappingProxyType({'mode': mode, 'fix': fix})
+
+
+def ext_signal(enabled=True, frequency=10**7, duty=50, offset=0):
+    return MappingProxyType({'enabled': enabled, 'frequency': frequency, 'duty': duty, 'offset': offset})
+
+
+def locked_monitor(on_change_callback=None):
+    monitor = ExtSignalHealthMonitor(on_change_callback)
+    monitor.set_expected_ext_signal(True, 10**7, 50, 0)
+    return monitor
+
+
+def test_stale_data_keeps_health_unlocked_after_data_loss():
+    changes = []
+    monitor = locked_monitor(lambda previous, current: changes.append(current))
+    pm, es = position_mode(), ext_signal()
+
+    monitor.update(pm, es, timestamp=0)
+    monitor.mark_unavailable(timestamp=10)
+    # first line after reconnection comes with the data known before the loss
+    monitor.update(pm, es, timestamp=20)
+    assert monitor.get_health() == ExtSignalHealth.UNLOCKED
+
+    # receiver reports its ext signal settings anew
+    monitor.update(pm, ext_signal(), timestamp=30)
+    assert monitor.get_health() == ExtSignalHealth.LOCKED
+    assert changes == [ExtSignalHealth.LOCKED, ExtSignalHealth.UNLOCKED, ExtSignalHealth.LOCKED]
+    assert monitor.get_statistics()['outages'] == 1
+
+
+def test_callback_is_invoked_on_changes_only():
+    changes = []
+    monitor = locked_monitor(lambda previous, current: changes.append((previous, current)))
+    pm, es = position_mode(), ext_signal()
+
+    for timestamp in range(5):
+        monitor.update(pm, es, timestamp=timestamp)
+    # equal data in a new snapshot doesn't change health either
+    monitor.update(position_mode(), ext_signal(), timestamp=5)
+
+    assert changes == [(ExtSignalHealth.NOT_DEFINED, ExtSignalHealth.LOCKED)]
+
+
+def test_health_follows_position_mode_and_ext_signal():
+    monitor = locked_monitor()
+
+    monitor.update(position_mode(), ext_signal())
+    assert monitor.get_health() == ExtSignalHealth.LOCKED
+    monitor.update(position_mode(fix=PositionFixMode.FIX_MISSING), ext_signal())
+    assert monitor.get_health() == ExtSignalHealth.HOLDOVER
+    monitor.update(position_mode(mode=PositionMode.SELF_SURVEY), ext_signal())
+    assert monitor.get_health() == ExtSignalHealth.HOLDOVER
+    monitor.update(position_mode(), ext_signal(frequency=10**6))
+    assert monitor.get_health() == ExtSignalHealth.UNLOCKED
+
+
+def test_expected_ext_signal_change_is_applied_on_next_update():
+    monitor = locked_monitor()
+    pm, es = position_mode(), ext_signal()
+    monitor.update(pm, es)
+
+    monitor.set_expected_ext_signal(True, 10**6, 50, 0)
+    assert monitor.get_health() == ExtSignalHealth.LOCKED
+    monitor.update(pm, es)
+    assert monitor.get_health() == ExtSignalHealth.UNLOCKED
+
+
+def test_outages_and_durations_are_counted():
+    monitor = locked_monitor()
+    locked, holdover = (position_mode(), ext_signal()), (position_mode(fix=PositionFixMode.FIX_MISSING), ext_signal())
+
+    monitor.update(*locked, timestamp=100)
+    monitor.update(*holdover, timestamp=110)
+    monitor.update(*locked, timestamp=115)
+    monitor.update(*holdover, timestamp=145)
+
+    statistics = monitor.get_statistics()
+    assert statistics['health'] == ExtSignalHealth.HOLDOVER
+    assert statistics['since'] == 145
+    assert statistics['outages'] == 2
+    assert monitor.get_uptime_sec(timestamp=150) == 40
+    assert monitor.get_outage_sec(timestamp=150) == 10
+
+
+def test_mark_unavailable_counts_outage_once():
+    changes = []
+    monitor = locked_monitor(lambda previous, current: changes.append(current))
+    monitor.update(position_mode(), ext_signal(), timestamp=0)
+
+    # serial errors are reported repeatedly during an outage
+    for timestamp in (10, 11, 12):
+        monitor.mark_unavailable(timestamp=timestamp)
+
+    assert changes == [ExtSignalHealth.LOCKED, ExtSignalHealth.UNLOCKED]
+    assert monitor.get_statistics()['outages'] == 1
+    assert monitor.get_outage_sec(timestamp=20) == 10
+
+
+def test_mark_unavailable_before_any_data():
+    monitor = locked_monitor()
+
+    monitor.mark_unavailable()
+    monitor.update(position_mode(), ext_signal())
+
+    assert monitor.get_health() == ExtSignalHealth.LOCKED
+
+
+def test_callback_exception_does_not_propagate():
+    def callback(previous, current):
+        raise RuntimeError('callback failure')
+    monitor = locked_monitor(callback)
+
+    monitor.update(position_mode(), ext_signal())
+
+    assert monitor.get_health() == ExtSignalHealth.LOCKED
@@ -0,0 +1,150 @@
+import time
+
+import pytest
+
+from timinggnss.query_scheduler import StatusQueryScheduler
+
+
+class Link:
+    """
+    Fake serial port collecting sent queries.
+
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.ready = True
+
+    def tx_data(self, data):
+        self.sent.append(data)
+
+    def tx_ready(self):
+        return self.ready
+
+
+def scheduler(link, baudrate=38400, tx_budget=1.0, state=lambda: 1, min_interval_sec=1, max_interval_sec=8):
+    scheduler = StatusQueryScheduler(baudrate, link.tx_data, tx_budget=tx_budget, tx_ready_callback=link.tx_ready)
+    scheduler.add_query('q', lambda: 'QUERY', state, min_interval_sec, max_interval_sec)
+    return scheduler, time.monotonic()
+
+
+def test_stable_state_backs_off_up_to_max_interval():
+    link = Link()
+    sq, now = scheduler(link)
+
+    waits = []
+    for _ in range(6):
+        wait_sec = sq.poll(now)
+        waits.append(wait_sec)
+        now += wait_sec
+
+    assert waits == [1, 2, 4, 8, 8, 8]
+    assert len(link.sent) == 6
+
+
+def test_state_change_restores_min_interval():
+    link = Link()
+    state = [1]
+    sq, now = scheduler(link, state=lambda: state[0])
+    for _ in range(4):
+        now += sq.poll(now)
+
+    state[0] = 2
+    assert sq.poll(now) == 1
+
+
+def test_not_due_query_is_not_sent():
+    link = Link()
+    sq, now = scheduler(link)
+    sq.poll(now)
+
+    assert sq.poll(now + 0.4) == pytest.approx(0.6)
+    assert len(link.sent) == 1
+
+
+def test_expedite_sends_query_immediately_and_keeps_min_interval():
+    link = Link()
+    sq, now = scheduler(link)
+    for _ in range(4):
+        now += sq.poll(now)
+    sent = len(link.sent)
+
+    sq.expedite('q')
+    now += 0.1
+    assert sq.poll(now) == 1
+    assert len(link.sent) == sent + 1
+    # state doesn't change but the change is still expected
+    assert sq.poll(now + 1) == 1
+    # until pending timeout passes
+    assert sq.poll(now + sq.pending_timeout_sec + 1) == 2
+
+
+def test_expedite_of_unknown_query_is_ignored():
+    link = Link()
+    sq, now = scheduler(link)
+
+    sq.expedite('unknown')
+
+    assert sq.poll(now) == 1
+
+
+def test_token_bucket_limits_queries_bandwidth():
+    link = Link()
+    # 10 bytes per second, 64 bytes burst, each query (and its reply) costs 10 bytes
+    sq, now = scheduler(link, baudrate=100, tx_budget=1.0, min_interval_sec=0.4, max_interval_sec=0.4)
+
+    while True:
+        sent = len(link.sent)
+        wait_sec = sq.poll(now)
+        if len(link.sent) == sent:
+            break
+        now += wait_sec
+
+    # burst and 4 bytes refilled per interval last for 11 queries, then 2 bytes are owed
+    assert len(link.sent) == 11
+    assert wait_sec == pytest.approx(0.2)
+    sq.poll(now + wait_sec + 0.01)
+    assert len(link.sent) == 12
+
+
+def test_accounted_tx_data_delays_queries():
+    link = Link()
+    sq, now = scheduler(link, baudrate=100, tx_budget=1.0)
+
+    sq.account_tx('x' * 100, now)
+
+    assert sq.poll(now) == pytest.approx(3.6)
+    assert link.sent == []
+
+
+def test_nothing_is_sent_while_link_is_not_ready():
+    link = Link()
+    sq, now = scheduler(link)
+    link.ready = False
+
+    for _ in range(5):
+        now += sq.poll(now)
+    assert link.sent == []
+
+    link.ready = True
+    sq.poll(now)
+    assert link.sent == ['QUERY']
+
+
+def test_failing_providers_do_not_stop_scheduling():
+    link = Link()
+    sq, _ = scheduler(link)
+    sq.add_query('broken_message', lambda: 1 / 0, lambda: 1)
+    sq.add_query('broken_state', lambda: 'BROKEN', lambda: 1 / 0)
+
+    assert sq.poll(time.monotonic()) == 1
+    assert link.sent == ['QUERY', 'BROKEN']
+
+
+def test_zero_tx_budget_disables_queries():
+    link = Link()
+    sq, now = scheduler(link, tx_budget=0)
+
+    sq.poll(now)
+
+    assert link.sent == []
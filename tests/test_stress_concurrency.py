@@ -0,0 +1,14 @@
+import sys
+
+import pytest
+
+pytest.importorskip('serial')
+
+from stress_concurrency import run  # noqa: E402
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='simulator needs a pseudo-terminal')
+def test_stress_concurrency():
+    errors = run(simulators=2, threads=4, duration_sec=2, max_p99_latency_sec=0.005)
+
+    assert errors == []
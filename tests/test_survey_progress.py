@@ -0,0 +1,81 @@
+import pytest
+
+from timinggnss.common.enums import PositionMode
+from timinggnss.survey_progress import SurveyProgressEstimator
+
+
+def position_mode(updates, mode=PositionMode.SELF_SURVEY, time_threshold=10):
+    return {'mode': mode, 'position_updates': updates, 'time_threshold': time_threshold}
+
+
+def test_single_update_gives_progress_without_eta():
+    estimator = SurveyProgressEstimator()
+
+    estimator.update(position_mode(60), timestamp=0)
+
+    progress = estimator.get_progress()
+    assert progress['target_updates'] == 600
+    assert progress['progress'] == pytest.approx(0.1)
+    assert progress['rate'] is None
+    assert progress['eta_sec'] is None
+
+
+def test_eta_follows_position_updates_rate():
+    estimator = SurveyProgressEstimator()
+
+    # one position update every two seconds
+    for second in range(0, 100, 2):
+        estimator.update(position_mode(100 + second // 2), timestamp=1000 + second)
+
+    progress = estimator.get_progress()
+    assert progress['rate'] == pytest.approx(0.5)
+    assert progress['eta_sec'] == pytest.approx((600 - 149) * 2)
+
+
+def test_survey_restart_resets_estimate():
+    estimator = SurveyProgressEstimator()
+    for second in range(10):
+        estimator.update(position_mode(500 + second), timestamp=second)
+
+    # restarted survey reports less updates than before
+    estimator.update(position_mode(5), timestamp=20)
+    assert estimator.get_progress()['rate'] is None
+    estimator.update(position_mode(9), timestamp=21)
+    assert estimator.get_progress()['rate'] == pytest.approx(4)
+
+
+def test_survey_parameters_change_resets_estimate():
+    estimator = SurveyProgressEstimator()
+    for second in range(10):
+        estimator.update(position_mode(second), timestamp=second)
+
+    estimator.update(position_mode(11, time_threshold=20), timestamp=11)
+
+    progress = estimator.get_progress()
+    assert progress['target_updates'] == 1200
+    assert progress['rate'] is None
+
+
+def test_time_only_mode_completes_survey():
+    estimator = SurveyProgressEstimator()
+    for second in range(10):
+        estimator.update(position_mode(second), timestamp=second)
+
+    estimator.update(position_mode(600, mode=PositionMode.TIME_ONLY), timestamp=10)
+
+    progress = estimator.get_progress()
+    assert progress['progress'] == 1.0
+    assert progress['eta_sec'] == 0.0
+
+
+def test_navigation_mode_has_no_estimate():
+    estimator = SurveyProgressEstimator()
+    for second in range(10):
+        estimator.update(position_mode(second), timestamp=second)
+
+    estimator.update(position_mode(0, mode=PositionMode.NAVIGATION), timestamp=10)
+
+    progress = estimator.get_progress()
+    assert progress['mode'] == PositionMode.NAVIGATION
+    assert progress['progress'] is None
+    assert progress['eta_sec'] is None
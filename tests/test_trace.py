@@ -0,0 +1,67 @@
+import logging
+
+from timinggnss.trace import TraceRing
+
+
+def test_ring_keeps_most_recent_records():
+    trace = TraceRing(size=3)
+
+    for index in range(5):
+        trace.rx('line %d' % index)
+
+    assert [data for _, _, data in trace.dump()] == ['line 2', 'line 3', 'line 4']
+
+
+def test_records_keep_direction_and_order():
+    trace = TraceRing()
+
+    trace.rx('$IN*00')
+    trace.tx('$OUT*00\r\n')
+    trace.garbage('xyz')
+
+    records = trace.dump()
+    assert [(direction, data) for _, direction, data in records] == [
+        (TraceRing.RX, '$IN*00'), (TraceRing.TX, '$OUT*00\r\n'), (TraceRing.GARBAGE, 'xyz')]
+    assert records[0][0] <= records[1][0] <= records[2][0]
+
+
+def test_dump_is_a_copy():
+    trace = TraceRing()
+    trace.rx('line')
+
+    dump = trace.dump()
+    trace.rx('another line')
+
+    assert len(dump) == 1
+
+
+def test_every_nth_record_is_logged(caplog):
+    trace = TraceRing(sample_every=3, sample_level=logging.INFO)
+
+    with caplog.at_level(logging.INFO):
+        for index in range(10):
+            trace.rx('line %d' % index)
+
+    assert [record.trace['data'] for record in caplog.records] == ['line 2', 'line 5', 'line 8']
+    assert caplog.records[0].trace['direction'] == TraceRing.RX
+
+
+def test_sampling_is_disabled_by_default(caplog):
+    trace = TraceRing()
+
+    with caplog.at_level(logging.DEBUG):
+        for index in range(10):
+            trace.rx('line %d' % index)
+
+    assert caplog.records == []
+
+
+def test_log_dump_logs_whole_trace(caplog):
+    trace = TraceRing(size=2)
+    for index in range(3):
+        trace.tx('line %d' % index)
+
+    with caplog.at_level(logging.ERROR):
+        trace.log_dump()
+
+    assert [record.trace['data'] for record in caplog.records] == ['line 1', 'line 2']
@@ -14,3 +14,10 @@ class PositionFixMode(Enum):
     FIX_MISSING = 1,
     FIX_2D = 2,
     FIX_3D = 3
+
+
+class ExtSignalHealth(Enum):
+    NOT_DEFINED = 0
+    LOCKED = 1
+    HOLDOVER = 2
+    UNLOCKED = 3
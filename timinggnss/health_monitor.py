@@ -0,0 +1,182 @@
+import logging
+import time
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from .common.enums import ExtSignalHealth, PositionMode, PositionFixMode
+
+
+class ExtSignalHealthMonitor:
+    """
+    External signal (reference frequency) health monitor of a single receiver.
+
+    Health is derived from decoded position mode and external signal data:
+        LOCKED - external signal is set as expected and receiver is in time only mode with a fix,
+        HOLDOVER - external signal is set as expected but GNSS timing is not available,
+        UNLOCKED - external signal is disabled or differs from the expected settings.
+    Monitor is edge triggered: HW adapter publishes immutable snapshots which are replaced
+    only when data changes, so unchanged input is detected by identity and costs nothing.
+    Callback is invoked (from the thread calling `update`) only when health changes;
+    its exceptions are logged so they never break the caller.
+    When data is no longer available (i.e. serial device is gone) `mark_unavailable` should
+    be called so health doesn't stay LOCKED on the last known data. External signal data
+    known at that moment is considered stale and health stays UNLOCKED until a newer
+    snapshot is provided.
+    Time spent in each health state and number of outages (leaving LOCKED) are counted.
+
+    Args:
+        on_change_callback (function, optional): Called with (previous, current) ExtSignalHealth on each change.
+
+    Attributes:
+        expected_ext_signal (Mapping): Expected external signal data (same keys as the HW adapter provides).
+        health (ExtSignalHealth): Current health.
+        statistics (Mapping): Counters published as a whole on each health change:
+            'health' (ExtSignalHealth): Health the counters refer to.
+            'since' (float): Time of the last health change (time.monotonic() based).
+            'durations_sec' (Mapping): Seconds spent in each health state before the last change.
+            'outages' (int): Number of transitions from LOCKED to any other state.
+
+    """
+
+    def __init__(self, on_change_callback=None):
+        self.on_change_callback = on_change_callback
+        self.expected_ext_signal = MappingProxyType({
+            'enabled': False,
+            'frequency': 0,
+            'duty': 0,
+            'offset': 0
+        })
+        self.health = ExtSignalHealth.NOT_DEFINED
+        self.statistics = MappingProxyType({
+            'health': self.health,
+            'since': time.monotonic(),
+            'durations_sec': MappingProxyType({health: 0.0 for health in ExtSignalHealth}),
+            'outages': 0
+        })
+        self.last_position_mode = None
+        self.last_ext_signal = None
+        self.last_expected_ext_signal = None
+        self.stale_ext_signal = None
+
+    def set_expected_ext_signal(self, enabled: bool, frequency: int, duty: int, offset: int) -> None:
+        """
+        Set external signal settings considered healthy.
+        Applied on the next `update` call.
+
+        """
+        self.expected_ext_signal = MappingProxyType({
+            'enabled': enabled,
+            'frequency': frequency,
+            'duty': duty,
+            'offset': offset
+        })
+
+    def update(self, position_mode: Mapping, ext_signal: Mapping, timestamp: Optional[float] = None) -> None:
+        """
+        Feed monitor with the latest data snapshots.
+
+        Args:
+            position_mode (Mapping): Position mode data snapshot as provided by the HW adapter.
+            ext_signal (Mapping): External signal data snapshot as provided by the HW adapter.
+            timestamp (float, optional): Data reception time (time.monotonic() based). Defaults to now.
+
+        """
+        expected_ext_signal = self.expected_ext_signal
+        if position_mode is self.last_position_mode and ext_signal is self.last_ext_signal \
+                and expected_ext_signal is self.last_expected_ext_signal:
+            return
+        self.last_position_mode = position_mode
+        self.last_ext_signal = ext_signal
+        self.last_expected_ext_signal = expected_ext_signal
+
+        if ext_signal is not self.stale_ext_signal:
+            self.stale_ext_signal = None
+
+        if self.stale_ext_signal is not None:
+            # nothing new was reported since the data was lost
+            health = ExtSignalHealth.UNLOCKED
+        elif not expected_ext_signal['enabled'] or ext_signal != expected_ext_signal:
+            health = ExtSignalHealth.UNLOCKED
+        elif position_mode['mode'] == PositionMode.TIME_ONLY and position_mode['fix'] != PositionFixMode.FIX_MISSING:
+            health = ExtSignalHealth.LOCKED
+        else:
+            health = ExtSignalHealth.HOLDOVER
+
+        if health != self.health:
+            self.__change_health(health, time.monotonic() if timestamp is None else timestamp)
+
+    def mark_unavailable(self, timestamp: Optional[float] = None) -> None:
+        """
+        Inform that receiver data is not available anymore (i.e. serial error or data loss).
+        Health becomes UNLOCKED (counted as an outage when LOCKED before) and stays so until
+        `update` provides external signal snapshot other than the last one seen.
+
+        Args:
+            timestamp (float, optional): Time the data was lost (time.monotonic() based). Defaults to now.
+
+        """
+        # last seen ext signal data can't be trusted anymore (i.e. receiver power-cycled)
+        if self.last_ext_signal is not None:
+            self.stale_ext_signal = self.last_ext_signal
+        # next update is evaluated even if it carries the same snapshots
+        self.last_position_mode = None
+        self.last_ext_signal = None
+        self.last_expected_ext_signal = None
+
+        if self.health != ExtSignalHealth.UNLOCKED:
+            self.__change_health(ExtSignalHealth.UNLOCKED, time.monotonic() if timestamp is None else timestamp)
+
+    def get_health(self) -> ExtSignalHealth:
+        return self.health
+
+    def get_statistics(self) -> Mapping:
+        return self.statistics
+
+    def get_uptime_sec(self, timestamp: Optional[float] = None) -> float:
+        """
+        Get total time spent in LOCKED state (including the ongoing period).
+
+        """
+        return self.__get_duration_sec(ExtSignalHealth.LOCKED, timestamp)
+
+    def get_outage_sec(self, timestamp: Optional[float] = None) -> float:
+        """
+        Get total time spent in HOLDOVER and UNLOCKED states (including the ongoing period).
+
+        """
+        return self.__get_duration_sec(ExtSignalHealth.HOLDOVER, timestamp) + \
+            self.__get_duration_sec(ExtSignalHealth.UNLOCKED, timestamp)
+
+    # Private methods #
+
+    def __change_health(self, health: ExtSignalHealth, timestamp: float) -> None:
+        previous_statistics = self.statistics
+        previous_health = previous_statistics['health']
+
+        durations_sec = dict(previous_statistics['durations_sec'])
+        durations_sec[previous_health] += timestamp - previous_statistics['since']
+        outages = previous_statistics['outages']
+        if previous_health == ExtSignalHealth.LOCKED:
+            outages += 1
+
+        self.statistics = MappingProxyType({
+            'health': health,
+            'since': timestamp,
+            'durations_sec': MappingProxyType(durations_sec),
+            'outages': outages
+        })
+        self.health = health
+
+        if self.on_change_callback:
+            try:
+                self.on_change_callback(previous_health, health)
+            except Exception:
+                # callback runs on the caller (i.e. serial reader) thread which must keep going
+                logging.exception('External signal health callback failed.')
+
+    def __get_duration_sec(self, health: ExtSignalHealth, timestamp: Optional[float]) -> float:
+        statistics = self.statistics
+        duration_sec = statistics['durations_sec'][health]
+        if statistics['health'] == health:
+            duration_sec += (time.monotonic() if timestamp is None else timestamp) - statistics['since']
+        return duration_sec
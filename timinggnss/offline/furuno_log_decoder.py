@@ -0,0 +1,338 @@
+import mmap
+import os
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..common.enums import PositionMode
+
+
+TPS3_DTYPE = np.dtype([
+    ('byte_offset', np.int64),
+    ('mode', np.int8),
+    ('sigma_threshold', np.int64),
+    ('position_updates', np.int64),
+    ('time_threshold', np.int64),
+    ('receiver_status', np.int64)
+])
+
+GSA_DTYPE = np.dtype([
+    ('byte_offset', np.int64),
+    ('fix', np.int8)
+])
+
+FREQ_DTYPE = np.dtype([
+    ('byte_offset', np.int64),
+    ('enabled', np.bool_),
+    ('frequency', np.int64),
+    ('duty', np.int64),
+    ('offset', np.int64)
+])
+
+DEFAULT_CHUNK_SIZE = 16 * 2**20
+
+# (sentence keyword, number of fields, indices of decoded fields)
+_TPS3 = (b'PERDCRY,TPS3', 11, (2, 4, 5, 6, 10))
+_GSA = (b'GNGSA,A', 19, (2,))
+_FREQ = (b'PERDAPI,FREQ', 6, (2, 3, 4, 5))
+
+# longest sentence prefix ('$' + keyword)
+_HEAD_LENGTH = 1 + max(len(_TPS3[0]), len(_GSA[0]), len(_FREQ[0]))
+
+# longest field parsed with numpy, anything longer is left to int()
+_MAX_FIELD_WIDTH = 15
+
+# values which can't be stored in the arrays
+_INT64_MIN = int(np.iinfo(np.int64).min)
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+_DECIMAL_DIGITS = np.full(256, -1, dtype=np.int64)
+_DECIMAL_DIGITS[ord('0'):ord('9') + 1] = np.arange(10)
+_HEX_DIGITS = np.full(256, -1, dtype=np.int64)
+_HEX_DIGITS[ord('0'):ord('9') + 1] = np.arange(10)
+_HEX_DIGITS[ord('A'):ord('F') + 1] = np.arange(10, 16)
+_UPPERCASE_HEX_DIGITS = _HEX_DIGITS.copy()
+_HEX_DIGITS[ord('a'):ord('f') + 1] = np.arange(10, 16)
+
+# Furuno position mode codes translated as in HwAdapterFuruno
+_POSITION_MODES = np.array([
+    PositionMode.NAVIGATION.value,
+    PositionMode.SELF_SURVEY.value,
+    PositionMode.SELF_SURVEY.value,
+    PositionMode.TIME_ONLY.value
+], dtype=np.int8)
+
+
+def iter_decode(source: Union[str, os.PathLike, bytes, bytearray, mmap.mmap], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Decode captured Furuno NMEA log chunk by chunk.
+
+    Lines are validated and decoded with the same rules HwAdapterFuruno applies to the
+    live data stream, so resulting values are identical to the ones observed online.
+    Well-formed sentences (checksums, field splitting and integer parsing) are handled
+    with numpy for the whole chunk at once; only unusual lines (garbage before a sentence,
+    signs or spaces in numbers, etc.) fall back to per-line decoding. Lines holding values
+    out of the int64 range are skipped.
+    Only one chunk (extended to the nearest line end) is held in memory at a time.
+
+    Decoding runs on a single core at roughly 40 MB/s for clean logs (about 25 s per GB);
+    logs with many unusual lines are slower (down to about 12 MB/s) as those lines are
+    decoded one by one.
+
+    Args:
+        source: Path to the log file or bytes / bytearray / mmap holding the log.
+        chunk_size (int, optional): Approximate number of bytes decoded at once. Defaults to 16 MiB.
+
+    Yields:
+        dict: Structured arrays for a chunk, keyed 'tps3' (TPS3_DTYPE), 'gsa' (GSA_DTYPE)
+            and 'freq' (FREQ_DTYPE). 'byte_offset' is the line start within the source,
+            'mode' holds PositionMode values and 'fix' holds fix codes (1 - FIX_MISSING,
+            2 - FIX_2D, 3 - FIX_3D) as translated by the online decoder.
+
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as log_file:
+            if os.fstat(log_file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield from iter_decode(buffer, chunk_size)
+        return
+
+    size = len(source)
+    start = 0
+    while start < size:
+        end = source.find(b'\n', min(start + chunk_size, size) - 1) + 1
+        if end <= 0:
+            end = size
+        yield _decode_chunk(bytes(source[start:end]), start)
+        start = end
+
+
+def decode(source: Union[str, os.PathLike, bytes, bytearray, mmap.mmap], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, np.ndarray]:
+    """
+    Decode whole captured Furuno NMEA log.
+
+    Same as iter_decode() but chunk results are concatenated.
+
+    """
+    result = {'tps3': [], 'gsa': [], 'freq': []}
+    for chunk_result in iter_decode(source, chunk_size):
+        for name, array in chunk_result.items():
+            result[name].append(array)
+    return {
+        'tps3': np.concatenate(result['tps3']) if result['tps3'] else np.empty(0, TPS3_DTYPE),
+        'gsa': np.concatenate(result['gsa']) if result['gsa'] else np.empty(0, GSA_DTYPE),
+        'freq': np.concatenate(result['freq']) if result['freq'] else np.empty(0, FREQ_DTYPE)
+    }
+
+
+# Private helpers #
+
+def _decode_chunk(chunk: bytes, chunk_offset: int) -> Dict[str, np.ndarray]:
+    buffer = np.frombuffer(chunk, dtype=np.uint8)
+    line_ends = np.flatnonzero(buffer == ord('\n'))
+    if len(line_ends) == 0 or line_ends[-1] != len(buffer) - 1:
+        line_ends = np.append(line_ends, len(buffer))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+
+    # well-formed line starts with '$' and has exactly one '*'
+    stars = np.flatnonzero(buffer == ord('*'))
+    first_star = np.searchsorted(stars, line_starts)
+    well_formed = np.searchsorted(stars, line_ends) - first_star == 1
+    star_positions = stars[np.minimum(first_star, len(stars) - 1)] if len(stars) else line_starts
+    commas = np.flatnonzero(buffer == ord(','))
+
+    # beginning of every line compared at once against sentence prefixes
+    heads = buffer[np.minimum(line_starts[:, None] + np.arange(_HEAD_LENGTH), len(buffer) - 1)]
+    heads[line_starts[:, None] + np.arange(_HEAD_LENGTH) >= line_ends[:, None]] = 0
+
+    # keyword found anywhere else than at the line start (sentence after a garbage,
+    # more sentences in one line, etc.) can't be handled with numpy - such lines are
+    # decoded one by one
+    sentences_lines = dict()
+    fallback = np.zeros(len(line_starts), dtype=bool)
+    for sentence in (_TPS3, _GSA, _FREQ):
+        prefix = np.frombuffer(b'$' + sentence[0], dtype=np.uint8)
+        sentences_lines[sentence] = np.all(heads[:, :len(prefix)] == prefix, axis=1)
+        occurrences = _find_all(buffer, sentence[0])
+        occurrence_lines = np.searchsorted(line_starts, occurrences, side='right') - 1
+        unusual = occurrences != line_starts[occurrence_lines] + 1
+        unusual |= ~sentences_lines[sentence][occurrence_lines]
+        fallback[occurrence_lines[unusual]] = True
+
+    decoded = {}
+    for name, sentence in (('tps3', _TPS3), ('gsa', _GSA), ('freq', _FREQ)):
+        decoded[name] = _decode_sentences(
+            buffer, commas, line_starts, star_positions, well_formed & sentences_lines[sentence] & ~fallback,
+            sentence, fallback)
+
+    rows = {_TPS3: [], _GSA: [], _FREQ: []}
+    for index in np.flatnonzero(fallback):
+        result = _decode_line(chunk[line_starts[index]:line_ends[index]])
+        if result is not None:
+            sentence, values = result
+            rows[sentence].append((chunk_offset + int(line_starts[index]),) + values)
+
+    return {
+        'tps3': _merge(decoded['tps3'], rows[_TPS3], chunk_offset, line_starts, TPS3_DTYPE),
+        'gsa': _merge(decoded['gsa'], rows[_GSA], chunk_offset, line_starts, GSA_DTYPE),
+        'freq': _merge(decoded['freq'], rows[_FREQ], chunk_offset, line_starts, FREQ_DTYPE)
+    }
+
+
+def _decode_sentences(buffer: np.ndarray, commas: np.ndarray, line_starts: np.ndarray, star_positions: np.ndarray, sentence_lines: np.ndarray, sentence: Tuple, fallback: np.ndarray) -> Dict[object, np.ndarray]:
+    # returns line indices ('line') and raw integer fields (keyed by field index)
+    # of the given sentence, lines needing per-line decoding are marked in fallback
+    _, field_count, field_indices = sentence
+    lines = np.flatnonzero(sentence_lines)
+    starts = line_starts[lines]
+    stars = star_positions[lines]
+
+    # checksum is a XOR of data between leading '$' and '*'
+    calculated = np.zeros(len(lines), dtype=np.uint8)
+    if len(lines):
+        indices = np.empty(2 * len(lines), dtype=np.int64)
+        indices[0::2] = starts + 1
+        indices[1::2] = stars
+        calculated = np.bitwise_xor.reduceat(buffer, indices)[0::2]
+    received, received_ok = _parse_digits(
+        buffer, stars + 1, np.minimum(stars + 3, len(buffer)), _UPPERCASE_HEX_DIGITS, 16)
+    valid = received_ok & (stars + 3 <= len(buffer)) & (calculated == received)
+
+    # field count must match exactly
+    first_comma = np.searchsorted(commas, starts)
+    valid &= np.searchsorted(commas, stars) - first_comma == field_count - 1
+    lines = lines[valid]
+    stars = stars[valid]
+    first_comma = first_comma[valid]
+
+    fields = {'line': lines}
+    parsed = np.ones(len(lines), dtype=bool)
+    for field_index in field_indices:
+        field_starts = commas[first_comma + field_index - 1] + 1
+        field_ends = commas[first_comma + field_index] if field_index < field_count - 1 else stars
+        if sentence is _TPS3 and field_index == 10:
+            # receiver status is parsed with int(value, 0) which allows a hex notation
+            fields[field_index], ok = _parse_status(buffer, field_starts, field_ends)
+        else:
+            fields[field_index], ok = _parse_digits(buffer, field_starts, field_ends, _DECIMAL_DIGITS, 10)
+        parsed &= ok
+
+    # anything else int() could still accept (signs, spaces...) is left for the fallback
+    fallback[lines[~parsed]] = True
+    if sentence is _FREQ:
+        # only enabled / disabled states are decoded
+        parsed &= fields[2] <= 1
+    return {key: values[parsed] for key, values in fields.items()}
+
+
+def _merge(fields: Dict[object, np.ndarray], rows: List[Tuple], chunk_offset: int, line_starts: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    result = np.empty(len(fields['line']), dtype=dtype)
+    result['byte_offset'] = chunk_offset + line_starts[fields['line']]
+    if dtype is TPS3_DTYPE:
+        known_mode = fields[2] < len(_POSITION_MODES)
+        result['mode'] = np.where(known_mode, _POSITION_MODES[np.where(known_mode, fields[2], 0)],
+                                  PositionMode.NOT_DEFINED.value)
+        result['sigma_threshold'] = fields[4]
+        result['position_updates'] = fields[5]
+        result['time_threshold'] = fields[6]
+        result['receiver_status'] = fields[10]
+    elif dtype is GSA_DTYPE:
+        result['fix'] = np.where((fields[2] == 2) | (fields[2] == 3), fields[2], 1)
+    else:
+        result['enabled'] = fields[2] == 1
+        result['frequency'] = fields[3]
+        result['duty'] = fields[4]
+        result['offset'] = fields[5]
+
+    if rows:
+        result = np.concatenate((result, np.array(rows, dtype=dtype)))
+        result = result[np.argsort(result['byte_offset'], kind='stable')]
+    return result
+
+
+def _find_all(buffer: np.ndarray, keyword: bytes) -> np.ndarray:
+    # positions of all keyword occurrences, candidates are narrowed down byte by byte
+    positions = np.flatnonzero(buffer[:max(len(buffer) - len(keyword) + 1, 0)] == keyword[0])
+    for index, byte in enumerate(keyword[1:], 1):
+        positions = positions[buffer[positions + index] == byte]
+    return positions
+
+
+def _starts_with(buffer: np.ndarray, positions: np.ndarray, prefix: bytes) -> np.ndarray:
+    result = positions + len(prefix) <= len(buffer)
+    for index, byte in enumerate(prefix):
+        result &= buffer[np.minimum(positions + index, len(buffer) - 1)] == byte
+    return result
+
+
+def _parse_digits(buffer: np.ndarray, starts: np.ndarray, ends: np.ndarray, digits_table: np.ndarray, base: int) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = ends - starts
+    width = int(min(lengths.max(initial=0), _MAX_FIELD_WIDTH))
+    if width == 0:
+        return np.zeros(len(starts), dtype=np.int64), np.zeros(len(starts), dtype=bool)
+
+    columns = np.arange(width)
+    used = columns < lengths[:, None]
+    digits = digits_table[buffer[np.minimum(starts[:, None] + columns, len(buffer) - 1)]]
+    ok = np.all((digits >= 0) | ~used, axis=1) & (lengths > 0) & (lengths <= _MAX_FIELD_WIDTH)
+    powers = np.where(used, lengths[:, None] - 1 - columns, 0)
+    values = np.where(used, digits * base ** powers, 0).sum(axis=1)
+    return values, ok
+
+
+def _parse_status(buffer: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # '0x..' / '0X..' hex or decimal without leading zeros (except plain '0')
+    hex_notation = _starts_with(buffer, starts, b'0x') | _starts_with(buffer, starts, b'0X')
+    hex_values, hex_ok = _parse_digits(buffer, starts + 2, ends, _HEX_DIGITS, 16)
+    decimal_values, decimal_ok = _parse_digits(buffer, starts, ends, _DECIMAL_DIGITS, 10)
+    leading_zero = _starts_with(buffer, starts, b'0') & (ends - starts > 1)
+    values = np.where(hex_notation, hex_values, decimal_values)
+    ok = np.where(hex_notation, hex_ok, decimal_ok & ~leading_zero)
+    return values, ok
+
+
+def _decode_line(line: bytes) -> Optional[Tuple[Tuple, Tuple]]:
+    # mirrors HwAdapterFuruno: __recover_message_from_data followed by the message decoders
+    parts = line.split(b'*')
+    if len(parts) != 2:
+        return None
+    data = parts[0].replace(b'$', b'', 1)
+    checksum = 0
+    for byte in data:
+        checksum ^= byte
+    if format(checksum, '02X').encode() != parts[1][:2]:
+        return None
+
+    fields = data.split(b',')
+    result = None
+    try:
+        if _TPS3[0] in data:
+            if len(fields) == _TPS3[1]:
+                result = _TPS3, (_translate_position_mode(int(fields[2])), int(fields[4]),
+                                 int(fields[5]), int(fields[6]), int(fields[10], 0))
+        elif _GSA[0] in data:
+            if len(fields) == _GSA[1]:
+                result = _GSA, (_translate_position_fix_mode(int(fields[2])),)
+        if result is None and _FREQ[0] in data and len(fields) == _FREQ[1] and int(fields[2]) in (0, 1):
+            result = _FREQ, (int(fields[2]) == 1, int(fields[3]), int(fields[4]), int(fields[5]))
+    except ValueError:
+        # such lines break online decoding as well, there are no values to reproduce
+        return None
+
+    # values out of the int64 range are accepted online but can't be stored - line is skipped
+    if result is not None and not all(_INT64_MIN <= value <= _INT64_MAX for value in result[1]):
+        return None
+    return result
+
+
+def _translate_position_mode(mode_code: int) -> int:
+    if 0 <= mode_code < len(_POSITION_MODES):
+        return int(_POSITION_MODES[mode_code])
+    return PositionMode.NOT_DEFINED.value
+
+
+def _translate_position_fix_mode(mode_code: int) -> int:
+    if mode_code in (2, 3):
+        return mode_code
+    return 1
@@ -0,0 +1,238 @@
+import logging
+import time
+from threading import Thread, Event, Lock
+
+
+class StatusQueryScheduler:
+    """
+    Adaptive scheduler of periodic status queries for a single serial port.
+
+    Each registered query is sent periodically. When the observed state (as returned by
+    the query state provider) stays the same, the query interval grows up to its maximum.
+    When the state changes or a change is expected (see `expedite`) the query is sent
+    at its minimal interval again.
+    Queries are limited with a per-port token bucket so they (and replies they trigger)
+    use only a fraction of the link bandwidth, which on slow links (9600/38400 baud) is
+    needed for periodic receiver output. Data written by other parties may be accounted
+    as well so queries give way to user commands.
+    While the link is not ready (i.e. serial port is closed) no query is sent, so queries
+    do not pile up during an outage; queries which became due are sent once it is back.
+    Exceptions raised by providers or the TX callback are logged and the query is retried
+    later, so the scheduling thread never dies.
+
+    Args:
+        baudrate (int): Serial port baud rate.
+        tx_data_callback (function): Function sending the query (accepts a single str argument).
+        tx_ready_callback (function, optional): Returns True when queries may be sent. Defaults to always ready.
+        tx_budget (float, optional): Fraction of the link bandwidth available for queries (0 disables queries). Defaults to 0.02.
+        backoff (float, optional): Interval multiplier applied when state is stable. Defaults to 2.
+        pending_timeout_sec (float, optional): How long an expected change keeps the minimal interval. Defaults to 30.
+
+    Attributes:
+        bytes_per_sec (float): Queries bandwidth limit.
+        queries (dict): Registered queries keyed by name.
+        tokens (float): Bytes which may be sent now (negative when the budget was exceeded).
+        tokens_capacity (float): Maximal burst in bytes.
+        expedite_requests (set): Names of queries to be expedited on the next poll.
+
+    Queries are owned by the scheduling thread (`poll`); other threads only hand over
+    expedite requests and TX accounting, both guarded by `tokens_mutex`.
+
+    """
+
+    def __init__(self, baudrate, tx_data_callback, tx_budget=0.02, backoff=2.0, pending_timeout_sec=30, tx_ready_callback=None):
+        if baudrate <= 0:
+            raise ValueError('Baud rate must be positive.')
+        if tx_budget < 0:
+            raise ValueError('TX budget must not be negative.')
+        # 10 bits per byte on the wire (start + 8 data + stop)
+        self.bytes_per_sec = baudrate / 10 * tx_budget
+        self.tx_data = tx_data_callback
+        self.tx_ready = tx_ready_callback
+        self.backoff = backoff
+        self.pending_timeout_sec = pending_timeout_sec
+        self.queries = dict()
+        # allow for a short burst (i.e. couple of queries at once just after start)
+        self.tokens_capacity = max(self.bytes_per_sec * 5, 64)
+        self.tokens = self.tokens_capacity
+        self.tokens_timestamp = time.monotonic()
+        self.tokens_mutex = Lock()
+        self.expedite_requests = set()
+        self.wakeup_event = Event()
+        self.started_event = Event()
+        self.thread = None
+
+    # Public methods #
+
+    def add_query(self, name, message_provider, state_provider, min_interval_sec=1, max_interval_sec=60):
+        """
+        Register periodic query.
+
+        Args:
+            name (str): Query name.
+            message_provider (function): Returns the query message (or None when it can't be sent now).
+            state_provider (function): Returns comparable value representing the state being queried.
+            min_interval_sec (float, optional): Query interval when a change is pending. Defaults to 1.
+            max_interval_sec (float, optional): Query interval when the state is stable. Defaults to 60.
+
+        """
+        self.queries[name] = {
+            'message': message_provider,
+            'state': state_provider,
+            'min_interval_sec': min_interval_sec,
+            'max_interval_sec': max_interval_sec,
+            'interval_sec': min_interval_sec,
+            'due': time.monotonic(),
+            'last_state': None,
+            'pending_until': 0
+        }
+        self.wakeup_event.set()
+
+    def expedite(self, name):
+        """
+        Inform that a change of the queried state is expected (i.e. a new setting was just sent).
+        Query is sent immediately and then at its minimal interval until the change is observed
+        or timeout passes.
+
+        """
+        # applied by the scheduling thread so a poll in progress can't overwrite it
+        with self.tokens_mutex:
+            self.expedite_requests.add(name)
+        self.wakeup_event.set()
+
+    def account_tx(self, data, timestamp=None):
+        """
+        Charge data sent by other parties to the port TX budget.
+
+        Args:
+            data (str): Data sent.
+            timestamp (float, optional): Time the data was sent (time.monotonic() based). Defaults to now.
+
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        with self.tokens_mutex:
+            self.__refill_tokens(now)
+            self.tokens -= len(data)
+
+    def poll(self, timestamp=None):
+        """
+        Send queries which are due (as long as TX budget allows).
+
+        Args:
+            timestamp (float, optional): Current time (time.monotonic() based). Defaults to now.
+
+        Returns:
+            float: Seconds to wait before the next poll.
+
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        wait_sec = max((query['max_interval_sec'] for query in self.queries.values()), default=1)
+
+        with self.tokens_mutex:
+            expedite_requests = self.expedite_requests
+            self.expedite_requests = set()
+        for name in expedite_requests:
+            query = self.queries.get(name)
+            if query:
+                query['pending_until'] = now + self.pending_timeout_sec
+                query['interval_sec'] = query['min_interval_sec']
+                # query right away (as long as TX budget allows) - commands are handled in order
+                # so the reply already reflects the new setting
+                query['due'] = now
+
+        if self.bytes_per_sec == 0:
+            # no bandwidth for queries at all
+            return wait_sec
+
+        if self.tx_ready and not self.tx_ready():
+            # nothing is queued while the link is down - check again shortly
+            return min((query['min_interval_sec'] for query in self.queries.values()), default=1)
+
+        for name, query in list(self.queries.items()):
+            if query['due'] > now:
+                wait_sec = min(wait_sec, query['due'] - now)
+                continue
+
+            try:
+                message = query['message']()
+            except Exception:
+                # scheduler thread must survive failing providers - try again later
+                logging.exception('Status query %s message provider failed.', name)
+                message = None
+            if message is None:
+                query['due'] = now + query['min_interval_sec']
+                wait_sec = min(wait_sec, query['min_interval_sec'])
+                continue
+
+            with self.tokens_mutex:
+                self.__refill_tokens(now)
+                if self.tokens < 0:
+                    # budget exceeded - wait until it is paid back
+                    wait_sec = min(wait_sec, -self.tokens / self.bytes_per_sec)
+                    continue
+                # reply of a comparable size is going to use the RX direction
+                self.tokens -= 2 * len(message)
+
+            try:
+                self.__adapt_interval(query, now)
+            except Exception:
+                logging.exception('Status query %s state provider failed.', name)
+                query['interval_sec'] = query['min_interval_sec']
+            query['due'] = now + query['interval_sec']
+            wait_sec = min(wait_sec, query['interval_sec'])
+            logging.debug('Status query: %s (next in %ss)', name, query['interval_sec'])
+            try:
+                self.tx_data(message)
+            except Exception:
+                logging.exception('Status query %s could not be sent.', name)
+
+        return max(wait_sec, 0.01)
+
+    def start(self):
+        """
+        Start scheduling thread.
+
+        """
+        if self.thread is None or not self.thread.is_alive():
+            self.started_event.set()
+            self.thread = Thread(target=self.__run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stop scheduling thread.
+
+        """
+        self.started_event.clear()
+        self.wakeup_event.set()
+        if self.thread:
+            self.thread.join()
+
+    # Private methods #
+
+    def __run(self):
+        while self.started_event.is_set():
+            # cleared upfront so no wake-up request is lost while polling
+            self.wakeup_event.clear()
+            wait_sec = self.poll()
+            self.wakeup_event.wait(wait_sec)
+
+    def __adapt_interval(self, query, now):
+        state = query['state']()
+        if state != query['last_state']:
+            # change observed - keep a close eye on it, pending change is fulfilled
+            query['last_state'] = state
+            query['interval_sec'] = query['min_interval_sec']
+            query['pending_until'] = 0
+        elif now < query['pending_until']:
+            query['interval_sec'] = query['min_interval_sec']
+        else:
+            query['interval_sec'] = min(
+                query['max_interval_sec'], query['interval_sec'] * self.backoff)
+
+    def __refill_tokens(self, now):
+        # timestamps taken by different threads before locking may come slightly out of order
+        if now > self.tokens_timestamp:
+            self.tokens = min(self.tokens_capacity, self.tokens +
+                              (now - self.tokens_timestamp) * self.bytes_per_sec)
+            self.tokens_timestamp = now
@@ -1,11 +1,20 @@
-import logging
 import time
+from types import MappingProxyType
 
 from .hw_adapter_interface import HwAdapterInterface
 from ..common.enums import PositionMode
 
 
 class GNSSReceiver:
+    """
+    Generic GNSS receiver driven by one of the registered HW adapters.
+
+    `process` is called from the serial reader thread while the remaining methods are
+    called by the user. Data shared between them (prefix list, adapter state) is never
+    modified in place but replaced by a new object so no locking is needed.
+
+    """
+
     def __init__(self, tx_data_callback):
         self.tx_data = tx_data_callback
 
@@ -14,9 +23,7 @@ class GNSSReceiver:
 
         self.hw = None
         self.hw_detected = False
-        self.hw_name = 'NA'
-        self.hw_version = 'NA'
-        self.hw_id = 'NA'
+        self.hw_info = self.__assemble_hw_info('NA', 'NA', 'NA')
 
     # Public methods #
 
@@ -24,11 +31,10 @@ class GNSSReceiver:
         self.hw_adapters_list.append(hw_adapter)
 
     def detect(self):
-        self.hw = None
+        # flag is cleared first so other threads never see detected HW without an adapter
         self.hw_detected = False
-        self.hw_name = 'NA'
-        self.hw_version = 'NA'
-        self.hw_id = 'NA'
+        self.hw = None
+        self.hw_info = self.__assemble_hw_info('NA', 'NA', 'NA')
 
         max_detection_time_sec = 5
 
@@ -50,13 +56,14 @@ class GNSSReceiver:
                 if self.hw_detected:
                     break
 
-            self.__disable_incoming_messages_processing(
-                self.hw.DETECTION_MESSAGES)
-
             # don't try another module when HW detected
+            # (detection messages are still processed to handle version queries)
             if self.hw_detected:
                 break
 
+            self.__disable_incoming_messages_processing(
+                self.hw.DETECTION_MESSAGES)
+
             # if not detected release the adapter and stop further data analysis
             self.__disable_incoming_messages_processing(
                 self.hw.STATUS_MESSAGES)
@@ -67,27 +74,37 @@ class GNSSReceiver:
     def process(self, message):
         for prefix in self.messages_processing_prefix_list:
             if prefix in message:
-                logging.debug('< ^^')
                 # incoming messages processing
-                if self.hw_detected:
+                if self.hw_detected and prefix not in self.hw.DETECTION_MESSAGES:
                     self.hw.process(message)
                 else:
                     self.__process_hw_detection(message)
 
+    def invalidate_data(self):
+        # called by the reader thread (i.e. on serial errors) so the adapter keeps a single writer
+        hw = self.hw
+        if hw is not None:
+            hw.invalidate_data()
+
     def get_status(self):
+        # name, version and id come from a single detection message
         result = dict()
         result['detected'] = self.hw_detected
-        result['name'] = self.hw_name
-        result['version'] = self.hw_version
-        result['id'] = self.hw_id
+        result.update(self.hw_info)
         return result
 
     def get_position_mode_status(self):
         return self.hw.get_position_mode_data()
 
+    def get_position_mode_snapshot(self):
+        return self.hw.get_position_mode_snapshot()
+
     def get_ext_signal_status(self):
         return self.hw.get_ext_signal_data()
 
+    def get_ext_signal_snapshot(self):
+        return self.hw.get_ext_signal_snapshot()
+
     def set_self_survey_position_mode(self, sigma_threshold: int = 0, time_threshold: int = 0):
         if self.hw_detected:
             self.__tx_data(self.hw.get_position_mode_set_message(
@@ -100,20 +117,34 @@ class GNSSReceiver:
 
     # Features #
 
-    def ext_signal_enable(self, frequency_hz, duty, offset_to_pps):
+    def ext_signal_enable(self, frequency_hz, duty, offset_to_pps, query_status=True):
         if self.hw_detected:
             # set signal parameters
             self.__tx_data(self.hw.get_ext_signal_enable_message(
                 frequency_hz, duty, offset_to_pps))
             # query for status
-            self.__tx_data(self.hw.get_ext_signal_status_message())
+            if query_status:
+                self.__tx_data(self.hw.get_ext_signal_status_message())
 
-    def ext_signal_disable(self):
+    def ext_signal_disable(self, query_status=True):
         if self.hw_detected:
             # disable signal
             self.__tx_data(self.hw.get_ext_signal_disable_message())
             # query for status
-            self.__tx_data(self.hw.get_ext_signal_status_message())
+            if query_status:
+                self.__tx_data(self.hw.get_ext_signal_status_message())
+
+    # Status queries (None when HW is not detected) #
+
+    def get_version_query_message(self):
+        if self.hw_detected:
+            return self.hw.get_detection_message()
+        return None
+
+    def get_ext_signal_status_query_message(self):
+        if self.hw_detected:
+            return self.hw.get_ext_signal_status_message()
+        return None
 
     # Private methods #
 
@@ -121,21 +152,29 @@ class GNSSReceiver:
         if self.hw is not None:
             detection_result = self.hw.detect(message)
             if detection_result is not None:
-                self.hw_name = detection_result['name']
-                self.hw_version = detection_result['version']
-                self.hw_id = detection_result['id']
+                self.hw_info = self.__assemble_hw_info(
+                    detection_result['name'], detection_result['version'], detection_result['id'])
                 self.hw_detected = True
 
+    def __assemble_hw_info(self, name, version, id):
+        return MappingProxyType({
+            'name': name,
+            'version': version,
+            'id': id
+        })
+
     def __tx_data(self, message):
         if self.tx_data:
             self.tx_data(message)
 
     def __enable_incoming_messages_processing(self, prefix_list):
+        # list being iterated by the reader thread is replaced, never modified
+        updated_prefix_list = list(self.messages_processing_prefix_list)
         for new_prefix in prefix_list:
-            if new_prefix not in self.messages_processing_prefix_list:
-                self.messages_processing_prefix_list.append(new_prefix)
+            if new_prefix not in updated_prefix_list:
+                updated_prefix_list.append(new_prefix)
+        self.messages_processing_prefix_list = updated_prefix_list
 
     def __disable_incoming_messages_processing(self, prefix_list):
-        for prefix in prefix_list:
-            if prefix in self.messages_processing_prefix_list:
-                self.messages_processing_prefix_list.remove(prefix)
+        self.messages_processing_prefix_list = [
+            prefix for prefix in self.messages_processing_prefix_list if prefix not in prefix_list]
@@ -1,10 +1,21 @@
-from typing import Optional, Union, Dict, List
+from types import MappingProxyType
+from typing import Optional, Union, Dict, List, Mapping, Tuple
 
 from .hw_adapter_interface import HwAdapterInterface
 from ..common.enums import PositionMode, PositionFixMode
 
 
 class HwAdapterFuruno(HwAdapterInterface):
+    """
+    Furuno timing receiver adapter.
+
+    Decoded state follows a single-writer model: only the thread feeding `process`
+    (the serial reader) modifies it. Each state change builds a new read-only mapping
+    which is then published, together with its version, with a single reference
+    assignment. Readers from any other thread therefore always see a complete
+    snapshot and never need a lock.
+
+    """
 
     DETECTION_MESSAGES = ['PERDSYS']
     STATUS_MESSAGES = ['PERDAPI', 'PERDCRY', 'GNGSA']
@@ -12,27 +23,15 @@ class HwAdapterFuruno(HwAdapterInterface):
     def __init__(self):
         self.MESSAGE_START_HOT = 'PERDAPI,START,HOT'
 
-        self.position_mode = {
-            'mode': PositionMode.NOT_DEFINED,
-            'fix': PositionFixMode.FIX_MISSING,
-            'sigma_threshold': 0,
-            'time_threshold': 0,
-            'position_updates': 0,
-            'receiver_status': 0
-        }
-
-        self.ext_signal = {
-            'enabled': False,
-            'frequency': 0,
-            'duty': 0,
-            'offset': 0
-        }
+        # (version, data) tuples replaced as a whole on each state change
+        self.position_mode_snapshot = (0, MappingProxyType(self.__initial_position_mode_data()))
+        self.ext_signal_snapshot = (0, MappingProxyType(self.__initial_ext_signal_data()))
 
     # General processing #
 
     def detect(self, data: str) -> Optional[Dict[str, str]]:
         message = self.__recover_message_from_data(data)
-        if len(message) > 0:
+        if message:
             # PERDSYS,VERSION,device,version,reason,reserve*CRC
             if 'PERDSYS,VERSION' in message:
                 data_count = 6
@@ -52,19 +51,33 @@ class HwAdapterFuruno(HwAdapterInterface):
 
     def process(self, data: str) -> None:
         message = self.__recover_message_from_data(data)
-        if len(message) > 0:
+        if message:
             if self.__detect_message(message, self.STATUS_MESSAGES):
                 decoded = self.__position_mode_decode(message)
                 if not decoded:
                     self.__ext_signal_status_decode(message)
 
+    def invalidate_data(self) -> None:
+        # data of a lost receiver is unknown - initial values are published as new versions
+        # so anything decoded afterwards is distinguishable from the stale data
+        self.position_mode_snapshot = self.__publish(
+            self.position_mode_snapshot, self.__initial_position_mode_data())
+        self.ext_signal_snapshot = self.__publish(
+            self.ext_signal_snapshot, self.__initial_ext_signal_data())
+
     # Data providers #
 
-    def get_position_mode_data(self) -> Optional[Dict[str, Union[int, PositionMode, PositionFixMode]]]:
-        return self.position_mode
+    def get_position_mode_data(self) -> Optional[Mapping[str, Union[int, PositionMode, PositionFixMode]]]:
+        return self.position_mode_snapshot[1]
+
+    def get_position_mode_snapshot(self) -> Tuple[int, Mapping[str, Union[int, PositionMode, PositionFixMode]]]:
+        return self.position_mode_snapshot
 
-    def get_ext_signal_data(self) -> Optional[Dict[str, Union[bool, int]]]:
-        return self.ext_signal
+    def get_ext_signal_data(self) -> Optional[Mapping[str, Union[bool, int]]]:
+        return self.ext_signal_snapshot[1]
+
+    def get_ext_signal_snapshot(self) -> Tuple[int, Mapping[str, Union[bool, int]]]:
+        return self.ext_signal_snapshot
 
     # Message generators #
 
@@ -145,19 +158,21 @@ class HwAdapterFuruno(HwAdapterInterface):
             data_count = 11
             data = message.split(',')
             if len(data) == data_count:
-                self.position_mode['mode'] = self.__translate_position_mode(
-                    int(data[2]))
-                self.position_mode['sigma_threshold'] = int(data[4])
-                self.position_mode['position_updates'] = int(data[5])
-                self.position_mode['time_threshold'] = int(data[6])
-                self.position_mode['receiver_status'] = int(data[10], 0)
+                self.position_mode_snapshot = self.__publish(self.position_mode_snapshot, {
+                    'mode': self.__translate_position_mode(int(data[2])),
+                    'sigma_threshold': int(data[4]),
+                    'position_updates': int(data[5]),
+                    'time_threshold': int(data[6]),
+                    'receiver_status': int(data[10], 0)
+                })
                 return True
         elif 'GNGSA,A' in message:
             data_count = 19
             data = message.split(',')
             if len(data) == data_count:
-                self.position_mode['fix'] = self.__translate_position_fix_mode(
-                    int(data[2]))
+                self.position_mode_snapshot = self.__publish(self.position_mode_snapshot, {
+                    'fix': self.__translate_position_fix_mode(int(data[2]))
+                })
                 return True
         # nothing was decoded
         return False
@@ -168,22 +183,54 @@ class HwAdapterFuruno(HwAdapterInterface):
             data = message.split(',')
             if len(data) == data_count:
                 if int(data[2]) == 0:
-                    self.ext_signal['enabled'] = False
+                    enabled = False
                 elif int(data[2]) == 1:
-                    self.ext_signal['enabled'] = True
+                    enabled = True
                 else:
                     # nothing was decoded
                     return False
 
-                self.ext_signal['frequency'] = int(data[3])
-                self.ext_signal['duty'] = int(data[4])
-                self.ext_signal['offset'] = int(data[5])
+                self.ext_signal_snapshot = self.__publish(self.ext_signal_snapshot, {
+                    'enabled': enabled,
+                    'frequency': int(data[3]),
+                    'duty': int(data[4]),
+                    'offset': int(data[5])
+                })
                 return True
         # nothing was decoded
         return False
 
     # Helpers #
 
+    def __initial_position_mode_data(self) -> Dict:
+        return {
+            'mode': PositionMode.NOT_DEFINED,
+            'fix': PositionFixMode.FIX_MISSING,
+            'sigma_threshold': 0,
+            'time_threshold': 0,
+            'position_updates': 0,
+            'receiver_status': 0
+        }
+
+    def __initial_ext_signal_data(self) -> Dict:
+        return {
+            'enabled': False,
+            'frequency': 0,
+            'duty': 0,
+            'offset': 0
+        }
+
+    def __publish(self, snapshot: Tuple[int, Mapping], changes: Dict) -> Tuple[int, Mapping]:
+        # snapshots are never modified in place - a new one is created only when
+        # something really changed so unchanged data keeps its version (and identity)
+        version, data = snapshot
+        for key, value in changes.items():
+            if data[key] != value:
+                updated = dict(data)
+                updated.update(changes)
+                return (version + 1, MappingProxyType(updated))
+        return snapshot
+
     def __assemble_message(self, data: str) -> Optional[str]:
         if len(data) < 1:
             return None
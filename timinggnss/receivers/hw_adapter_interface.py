@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Union, Dict
+from typing import Optional, Union, Dict, Mapping, Tuple
 
 from ..common.enums import PositionMode, PositionFixMode
 
@@ -15,14 +15,26 @@ class HwAdapterInterface(ABC):
     def process(self, data: str) -> None:
         pass
 
+    @abstractmethod
+    def invalidate_data(self) -> None:
+        pass
+
     # Data providers #
 
     @abstractmethod
-    def get_position_mode_data(self) -> Optional[Dict[str, Union[int, PositionMode, PositionFixMode]]]:
+    def get_position_mode_data(self) -> Optional[Mapping[str, Union[int, PositionMode, PositionFixMode]]]:
+        pass
+
+    @abstractmethod
+    def get_position_mode_snapshot(self) -> Tuple[int, Mapping[str, Union[int, PositionMode, PositionFixMode]]]:
+        pass
+
+    @abstractmethod
+    def get_ext_signal_data(self) -> Optional[Mapping[str, Union[bool, int]]]:
         pass
 
     @abstractmethod
-    def get_ext_signal_data(self) -> Optional[Dict[str, Union[bool, int]]]:
+    def get_ext_signal_snapshot(self) -> Tuple[int, Mapping[str, Union[bool, int]]]:
         pass
 
     # Message generators #
@@ -1,8 +1,11 @@
+from collections import deque
 import logging
 import serial
-from threading import Thread, Lock
+from threading import Thread, Lock, Event
 import time
 
+from .trace import TraceRing
+
 
 class SerialThread(Thread):
     """
@@ -14,6 +17,12 @@ class SerialThread(Thread):
     bytes.
     It runs in a separate thread, allowing for concurrent reading from the serial port.
 
+    Concurrency model: start/stop and pause/resume requests are signalled with events and
+    queued data is kept in a deque, both safe to use from any thread without extra locking.
+    Only the internal thread reads from the port and pops from the queue.
+    Data queued when the connection is lost is dropped (stale commands are not sent
+    to a device which might have been power-cycled in the meantime).
+
     Args:
         port (str): The serial port to connect to (e.g., "/dev/ttyUSB0").
         baudrate (int): The baud rate for the serial communication (e.g., 38400).
@@ -22,6 +31,7 @@ class SerialThread(Thread):
         on_error_callback (function): The callback function to be invoked when a serial device error is detected.
             Invoking this function inform subscriber that no further data readout is possible.
         max_bytes (int, optional): The maximum number of bytes to receive for each line. Defaults to 1024.
+        trace (TraceRing, optional): Trace recording all the traffic. Defaults to a new TraceRing.
 
     Attributes:
         port (str): The serial port to connect to.
@@ -29,28 +39,49 @@ class SerialThread(Thread):
         on_new_line_callback (function): The callback function to be invoked when a new line is received.
         on_error_callback (function): The callback function to be invoked when a serial device error is detected.
         max_bytes (int): The maximum number of bytes to receive for each line.
+        trace (TraceRing): Trace of recent incoming lines, garbage data and sent data (dumped on errors).
         serial_port (serial.Serial): The serial connection object.
-        is_started (bool): Indocates if the reading/writing thread is started.
-        is_paused (bool): Indicates if the reading loop is currently paused (writing is possible).
-        write_queue (list): Queue to store messages to send.
+        is_started (bool): Indicates if the reading/writing thread is started (read-only).
+        is_paused (bool): Indicates if the reading loop is currently paused (writing is possible, read-only).
+        is_connected (bool): Indicates if the serial port is currently open (read-only).
+        write_queue (collections.deque): Queue to store messages to send.
         thread (threading.Threadad): Thread responsible for serial communication.
+        time_to_first_line (float): Seconds from the last start/resume to the first delivered line (None until measured).
 
     """
 
-    def __init__(self, port, baudrate, on_new_line_callback, on_error_callback=None, max_bytes=1024):
+    REOPEN_DELAY_SEC = 0.5
+
+    def __init__(self, port, baudrate, on_new_line_callback, on_error_callback=None, max_bytes=1024, trace=None):
         self.port = port
         self.baudrate = baudrate
         self.on_new_line_callback = on_new_line_callback
         self.on_error_callback = on_error_callback
         self.max_bytes = max_bytes
+        self.trace = trace if trace is not None else TraceRing()
         self.serial_port = None
-        self.is_started = False
-        self.is_paused = False
-        self.write_queue = []
+        self.started_event = Event()
+        self.resumed_event = Event()
+        self.resumed_event.set()
+        self.connected_event = Event()
+        self.write_queue = deque()
         self.thread = None
+        self.time_to_first_line = None
         self.mutex = Lock()
         Thread.__init__(self)
 
+    @property
+    def is_started(self):
+        return self.started_event.is_set()
+
+    @property
+    def is_paused(self):
+        return not self.resumed_event.is_set()
+
+    @property
+    def is_connected(self):
+        return self.connected_event.is_set()
+
     def __run(self):
         """
         The main method executed in the thread.
@@ -59,18 +90,21 @@ class SerialThread(Thread):
         Invokes the callback function when a new line is received
         ('\n' is not included) or an error detected.
         Spawned thread may be paused, resumed, stopped and restarted.
-        When stared or resumed data is synchronized to new line,
-        treating all preceding bytes as garbage data.
+        When started or resumed, all data buffered so far is flushed and incoming data
+        is synchronized to the next sentence start ('$'), treating all preceding bytes
+        as garbage data. Data is read in chunks of whatever is already available.
 
         """
         # most outer loop is used to re-open serial port in case of an errors detected
         # which is usable when, for example, one disconnect the serial device by accident
         while True:
+            connection_opened = False
             try:
                 self.__open_serial_connection()
-                sync_with_newline = True
-                garbage_data = ''
-                line_buffer = ''
+                connection_opened = True
+                self.connected_event.set()
+                resync = True
+                line_buffer = b''
 
                 # inner loop control general flow of the write/read process
                 # each step checks if process is_running to quickly exit
@@ -81,37 +115,65 @@ class SerialThread(Thread):
 
                     if self.serial_port.is_open and self.is_paused:
                         # when reader is paused do not consume too much CPU time
-                        sync_with_newline = True
-                        time.sleep(0.1)
+                        # but wake up immediately on resume
+                        resync = True
+                        self.resumed_event.wait(0.1)
                         continue
 
-                    while self.serial_port.is_open and sync_with_newline:
-                        # sync by reading small chunks of incoming ASCII data
-                        garbage_data += self.serial_port.read_until(
-                            b'\n', 100).decode('UTF-8')
-                        if garbage_data[-1] == '\n':
-                            logging.debug('< [g] %s', garbage_data[::-1])
-                            sync_with_newline = False
-                            garbage_data = ''
-                            line_buffer = ''
+                    if self.serial_port.is_open and resync:
+                        # stale data is dropped at once instead of being read out
+                        self.serial_port.reset_input_buffer()
+                        resync = False
+                        awaiting_sentence_start = True
+                        awaiting_first_line = True
+                        line_buffer = b''
+                        resync_timestamp = time.monotonic()
 
                     if self.serial_port.is_open:
-                        # analyze incoming data byte by byte
-                        incoming_byte = self.serial_port.read(
-                            1).decode('UTF-8')
-                        if incoming_byte == '\n':
+                        # wait for at least one byte but take everything what is available
+                        incoming_data = self.serial_port.read(
+                            self.serial_port.in_waiting or 1)
+
+                        if awaiting_sentence_start:
+                            sentence_start = incoming_data.find(b'$')
+                            if sentence_start < 0:
+                                if incoming_data:
+                                    self.trace.garbage(incoming_data.decode('UTF-8', errors='replace'))
+                                continue
+                            if sentence_start > 0:
+                                self.trace.garbage(incoming_data[:sentence_start].decode('UTF-8', errors='replace'))
+                            incoming_data = incoming_data[sentence_start:]
+                            awaiting_sentence_start = False
+
+                        line_buffer += incoming_data
+                        line_end = line_buffer.find(b'\n')
+                        while line_end >= 0:
                             # send received line for further processing
-                            logging.debug('< %s', line_buffer)
-                            self.on_new_line_callback(line_buffer)
-                            line_buffer = ''
-                        elif len(incoming_byte) > 0 and len(line_buffer) < self.max_bytes:
-                            # line buffer is filled up to its capacity
-                            line_buffer += incoming_byte
+                            # (bytes above the line capacity are dropped)
+                            line = line_buffer[:min(line_end, self.max_bytes)].decode(
+                                'UTF-8', errors='replace')
+                            line_buffer = line_buffer[line_end + 1:]
+                            if awaiting_first_line:
+                                self.time_to_first_line = time.monotonic() - resync_timestamp
+                                awaiting_first_line = False
+                            self.trace.rx(line)
+                            self.on_new_line_callback(line)
+                            line_end = line_buffer.find(b'\n')
+
+                        if len(line_buffer) > self.max_bytes:
+                            # line buffer is kept up to its capacity
+                            line_buffer = line_buffer[:self.max_bytes]
                 # when above loop is finished it means thread end was requested
                 break
-            except serial.SerialException as e:
+            except (serial.SerialException, OSError) as e:
                 # any problem with the serial device stops its further usage
+                # (in_waiting reports a lost device with a plain OSError)
                 logging.error('Serial connection error: %s', e)
+                # recent traffic is dumped once - not on every failed re-open attempt
+                if connection_opened:
+                    self.trace.log_dump()
+                # queued commands were meant for the lost connection
+                self.write_queue.clear()
                 if self.on_error_callback:
                     self.on_error_callback()
             finally:
@@ -120,6 +182,8 @@ class SerialThread(Thread):
                 # if thread stop was requested this method should return
                 if not self.is_started:
                     return
+                # do not hammer missing device with re-open attempts
+                time.sleep(self.REOPEN_DELAY_SEC)
 
     def start(self):
         """
@@ -129,10 +193,12 @@ class SerialThread(Thread):
         """
         if self.thread == None or not self.thread.is_alive():
             try:
+                # flag is set upfront so the new thread never observes a stop request
+                self.started_event.set()
                 self.thread = Thread(target=self.__run)
                 self.thread.start()
-                self.is_started = True
             except:
+                self.started_event.clear()
                 logging.error('Can\'t start serial handling thread!')
 
     def stop(self):
@@ -141,8 +207,8 @@ class SerialThread(Thread):
         It terminate internally spawned reading/writing thread and close serial connection.
 
         """
+        self.started_event.clear()
         self.__close_serial_connection()
-        self.is_started = False
 
     def join(self):
         """
@@ -163,7 +229,7 @@ class SerialThread(Thread):
         The thread will continue running, but no data will be read from the serial port.
 
         """
-        self.is_paused = True
+        self.resumed_event.clear()
 
     def resume(self):
         """
@@ -173,7 +239,10 @@ class SerialThread(Thread):
         Data will be synchronized to the next incoming message.
 
         """
-        self.is_paused = False
+        if self.is_paused:
+            # measured anew once the reader catches up with the incoming data
+            self.time_to_first_line = None
+        self.resumed_event.set()
 
     def write(self, data):
         """
@@ -198,6 +267,7 @@ class SerialThread(Thread):
         Close HW connection to the serial device.
 
         """
+        self.connected_event.clear()
         with self.mutex:
             if self.serial_port and self.serial_port.is_open:
                 self.serial_port.close()
@@ -209,6 +279,6 @@ class SerialThread(Thread):
         """
         if self.serial_port and self.serial_port.is_open:
             while self.write_queue:
-                data = self.write_queue.pop(0)
-                logging.debug('> %s', data)
+                data = self.write_queue.popleft()
+                self.trace.tx(data)
                 self.serial_port.write(data.encode('UTF-8'))
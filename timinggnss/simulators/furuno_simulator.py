@@ -0,0 +1,269 @@
+import logging
+import os
+import random
+import select
+import time
+import tty
+from threading import Thread, Event
+from typing import Optional
+
+
+class FurunoSimulator:
+    """
+    Furuno timing receiver simulator exposed over a pseudo-terminal.
+
+    Slave side of the pty pair behaves like a serial device connected to a Furuno
+    timing module so it may be opened with SerialThread (or TimingGnss) as any other
+    port. Simulator answers PERDSYS,VERSION, PERDAPI,SURVEY and PERDAPI,FREQ commands
+    (including FREQ,QUERY) and periodically emits PERDCRY,TPS3 and GNGSA sentences.
+    Outgoing data is paced according to the baud rate. Noise, corrupted checksums and
+    disconnects may be injected to exercise error handling.
+    Accepted commands are acknowledged with ACK, malformed ones with NAK.
+    Each simulator runs its own thread so many of them can be used within one process.
+
+    Self survey advances by one position update per emitted PERDCRY,TPS3 sentence and
+    ends with time only mode when time threshold (minutes, 60 updates each) is reached,
+    so higher TPS3 rates shorten the survey accordingly.
+
+    Args:
+        baudrate (int, optional): Simulated line rate used for output pacing. Defaults to 38400.
+        tps3_rate_hz (float, optional): PERDCRY,TPS3 emission rate (0 disables). Defaults to 1.
+        gsa_rate_hz (float, optional): GNGSA emission rate (0 disables). Defaults to 1.
+        noise_probability (float, optional): Probability of a garbage line before each sentence. Defaults to 0.
+        corrupt_checksum_probability (float, optional): Probability of a sentence having wrong checksum. Defaults to 0.
+        link_path (str, optional): Symlink kept pointing to the current slave device (survives reconnects).
+        seed (int, optional): Seed for injected errors to make runs repeatable.
+
+    Attributes:
+        port (str): Path to be opened by the serial port user (link_path if given).
+        device_name (str): Reported device name.
+        device_version (str): Reported firmware version.
+        device_id (str): Reported device identifier.
+        position_mode (int): Furuno position mode code (0 - NAV, 1 - SS, 3 - TO).
+        fix (int): Reported fix code (1 - missing, 2 - 2D, 3 - 3D).
+        sigma_threshold (int): Self survey sigma threshold in meters.
+        time_threshold (int): Self survey time threshold in minutes.
+        position_updates (int): Self survey position updates.
+        ext_signal (list): External signal settings [enabled, frequency, duty, offset].
+        commands_received (int): Number of received commands with a valid checksum.
+
+    """
+
+    ACK = 'PERDACK,PERDAPI,0,0'
+    NAK = 'PERDACK,PERDAPI,0,1'
+
+    def __init__(self, baudrate=38400, tps3_rate_hz=1.0, gsa_rate_hz=1.0, noise_probability=0.0, corrupt_checksum_probability=0.0, link_path=None, seed=None):
+        self.baudrate = baudrate
+        self.tps3_rate_hz = tps3_rate_hz
+        self.gsa_rate_hz = gsa_rate_hz
+        self.noise_probability = noise_probability
+        self.corrupt_checksum_probability = corrupt_checksum_probability
+        self.link_path = link_path
+        self.random = random.Random(seed)
+
+        self.device_name = 'GT-87'
+        self.device_version = '4850A00'
+        self.device_id = 'SIM'
+        self.position_mode = 0
+        self.fix = 3
+        self.sigma_threshold = 0
+        self.time_threshold = 0
+        self.position_updates = 0
+        self.ext_signal = [0, 0, 0, 0]
+        self.commands_received = 0
+
+        self.master_fd = None
+        self.slave_fd = None
+        self.slave_name = None
+        self.rx_buffer = b''
+        self.tx_busy_until = 0.0
+        self.stop_event = Event()
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.link_path if self.link_path else self.slave_name
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """
+        Open the pty pair and start emitting data.
+
+        """
+        if self.thread is None or not self.thread.is_alive():
+            self.__open_pty()
+            self.stop_event.clear()
+            self.thread = Thread(target=self.__run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stop emitting data and close the pty pair.
+
+        """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        self.__close_pty()
+
+    def disconnect(self):
+        """
+        Simulate device removal - the pty pair is closed so the port user gets an error.
+
+        """
+        self.stop()
+
+    def reconnect(self):
+        """
+        Simulate device plug-in - new pty pair is opened (link_path follows it).
+
+        """
+        self.start()
+
+    # Private methods #
+
+    def __run(self):
+        now = time.monotonic()
+        next_tps3 = now
+        next_gsa = now
+        while not self.stop_event.is_set():
+            deadlines = [0.1]
+            if self.tps3_rate_hz > 0:
+                deadlines.append(next_tps3 - now)
+            if self.gsa_rate_hz > 0:
+                deadlines.append(next_gsa - now)
+            timeout = max(0.0, min(deadlines))
+
+            try:
+                readable, _, _ = select.select([self.master_fd], [], [], timeout)
+                if readable:
+                    self.__receive(os.read(self.master_fd, 1024))
+            except OSError:
+                # nobody holds the slave side open
+                self.stop_event.wait(timeout)
+
+            now = time.monotonic()
+            if self.tps3_rate_hz > 0 and now >= next_tps3:
+                next_tps3 = max(next_tps3 + 1 / self.tps3_rate_hz, now)
+                self.__emit_tps3()
+            if self.gsa_rate_hz > 0 and now >= next_gsa:
+                next_gsa = max(next_gsa + 1 / self.gsa_rate_hz, now)
+                self.__emit_gsa()
+            now = time.monotonic()
+
+    def __receive(self, data: bytes):
+        self.rx_buffer += data
+        while b'\n' in self.rx_buffer:
+            line, self.rx_buffer = self.rx_buffer.split(b'\n', 1)
+            message = self.__recover_message(line.decode('UTF-8', errors='replace').strip())
+            if message is not None:
+                self.commands_received += 1
+                self.__handle_command(message)
+
+    def __handle_command(self, message: str):
+        fields = message.split(',')
+        try:
+            if message == 'PERDSYS,VERSION':
+                self.__send('PERDSYS,VERSION,' + self.device_name + ',' +
+                            self.device_version + ',0,' + self.device_id)
+            elif message.startswith('PERDAPI,SURVEY,') and len(fields) >= 5:
+                if fields[2] == '1':
+                    # all values parsed before the state is touched
+                    sigma_threshold, time_threshold = int(fields[3]), int(fields[4])
+                    self.position_mode = 1
+                    self.sigma_threshold = sigma_threshold
+                    self.time_threshold = time_threshold
+                    self.position_updates = 0
+                elif fields[2] == '3':
+                    self.position_mode = 3
+                self.__send(self.ACK)
+            elif message == 'PERDAPI,FREQ,QUERY':
+                self.__send('PERDAPI,FREQ,' + ','.join(str(value) for value in self.ext_signal))
+            elif message.startswith('PERDAPI,FREQ,') and len(fields) == 6:
+                self.ext_signal = [int(value) for value in fields[2:]]
+                self.__send(self.ACK)
+            else:
+                logging.debug('Simulator: unsupported command %s', message)
+        except ValueError:
+            # malformed command must not stop the simulator
+            logging.debug('Simulator: malformed command %s', message)
+            self.__send(self.NAK)
+
+    def __emit_tps3(self):
+        if self.position_mode == 1:
+            self.position_updates += 1
+            if self.position_updates >= self.time_threshold * 60:
+                self.position_mode = 3
+        self.__send('PERDCRY,TPS3,' + str(self.position_mode) + ',0,' +
+                    str(self.sigma_threshold) + ',' + str(self.position_updates) + ',' +
+                    str(self.time_threshold) + ',0,0,0,0x00')
+
+    def __emit_gsa(self):
+        satellites = ['01', '03', '06', '11', '14', '17', '19', '22', '', '', '', '']
+        self.__send('GNGSA,A,' + str(self.fix) + ',' + ','.join(satellites) +
+                    ',1.5,0.9,1.2,1')
+
+    def __send(self, data: str):
+        if self.random.random() < self.noise_probability:
+            noise = ''.join(chr(self.random.randint(0x20, 0x7E))
+                            for _ in range(self.random.randint(1, 40)))
+            self.__write(noise + '\r\n')
+
+        checksum = self.__checksum(data)
+        if self.random.random() < self.corrupt_checksum_probability:
+            checksum ^= self.random.randint(1, 0xFF)
+        self.__write('$' + data + '*' + format(checksum, '02X') + '\r\n')
+
+    def __write(self, data: str):
+        # pace output as a real UART would (10 bits per byte)
+        now = time.monotonic()
+        if self.tx_busy_until > now:
+            time.sleep(self.tx_busy_until - now)
+            now = self.tx_busy_until
+        self.tx_busy_until = now + len(data) * 10 / self.baudrate
+        try:
+            os.write(self.master_fd, data.encode('UTF-8'))
+        except (BlockingIOError, OSError):
+            # nobody reads the data fast enough (or at all) - bytes are lost as on a real link
+            pass
+
+    def __open_pty(self):
+        self.master_fd, self.slave_fd = os.openpty()
+        # slave is kept open so the pty survives port users coming and going
+        tty.setraw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.slave_name = os.ttyname(self.slave_fd)
+        self.rx_buffer = b''
+        if self.link_path:
+            if os.path.islink(self.link_path):
+                os.unlink(self.link_path)
+            os.symlink(self.slave_name, self.link_path)
+
+    def __close_pty(self):
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self.master_fd = None
+        self.slave_fd = None
+        if self.link_path and os.path.islink(self.link_path):
+            os.unlink(self.link_path)
+
+    def __recover_message(self, line: str) -> Optional[str]:
+        if not line.startswith('$') or '*' not in line:
+            return None
+        data, checksum = line[1:].split('*', 1)
+        if format(self.__checksum(data), '02X') != checksum[:2]:
+            return None
+        return data
+
+    def __checksum(self, data: str) -> int:
+        checksum = 0
+        for byte in data:
+            checksum ^= ord(byte)
+        return checksum
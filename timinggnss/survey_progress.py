@@ -0,0 +1,124 @@
+import time
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
+
+from .common.enums import PositionMode
+
+
+class SurveyProgressEstimator:
+    """
+    Incremental self survey progress estimator.
+
+    Consumes decoded position mode data (as provided by the HW adapter) and estimates
+    survey progress together with the time left until the receiver enters time only
+    (precise timing) mode. Position update rate is tracked with a running least squares
+    fit of position updates over time, so each update costs O(1) regardless of the
+    survey length.
+
+    Survey target is derived from the time threshold (in minutes) assuming position
+    updates are reported once per second. Sigma threshold may complete the survey
+    earlier, so the estimate is an upper bound.
+
+    Args:
+        position_updates_per_minute (int, optional): Expected position updates per minute. Defaults to 60.
+
+    Attributes:
+        progress (Mapping): Latest published estimate, replaced as a whole on each update:
+            'mode' (PositionMode): Current position mode.
+            'position_updates' (int): Position updates reported by the receiver.
+            'target_updates' (int): Position updates needed to finish the survey (0 if unknown).
+            'progress' (float): Survey progress in range 0..1 (None if unknown).
+            'rate' (float): Position updates per second (None until estimated).
+            'eta_sec' (float): Estimated seconds to time only mode (None if unknown).
+
+    """
+
+    def __init__(self, position_updates_per_minute=60):
+        self.position_updates_per_minute = position_updates_per_minute
+        self.progress = self.__assemble_progress(PositionMode.NOT_DEFINED, 0, 0, None, None, None)
+        self.__reset()
+
+    def update(self, position_mode: Mapping[str, Union[int, PositionMode]], timestamp: Optional[float] = None) -> None:
+        """
+        Feed estimator with new position mode data.
+
+        Args:
+            position_mode (Mapping): Position mode data as provided by the HW adapter.
+            timestamp (float, optional): Data reception time (time.monotonic() based). Defaults to now.
+
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        mode = position_mode['mode']
+        updates = position_mode['position_updates']
+        target = position_mode['time_threshold'] * self.position_updates_per_minute
+
+        if mode == PositionMode.TIME_ONLY:
+            self.__reset()
+            self.progress = self.__assemble_progress(mode, updates, target, 1.0, None, 0.0)
+            return
+
+        if mode != PositionMode.SELF_SURVEY:
+            self.__reset()
+            self.progress = self.__assemble_progress(mode, updates, target, None, None, None)
+            return
+
+        # new survey (or survey restarted with different parameters)
+        if self.__t0 is None or target != self.__target or updates < self.__last_updates:
+            self.__reset()
+            self.__t0 = timestamp
+            self.__u0 = updates
+            self.__target = target
+        self.__last_updates = updates
+
+        # running sums for least squares fit of updates = a + rate * t
+        t = timestamp - self.__t0
+        u = updates - self.__u0
+        self.__n += 1
+        self.__sum_t += t
+        self.__sum_u += u
+        self.__sum_tt += t * t
+        self.__sum_tu += t * u
+
+        rate = None
+        denominator = self.__n * self.__sum_tt - self.__sum_t * self.__sum_t
+        if self.__n > 1 and denominator > 0:
+            slope = (self.__n * self.__sum_tu - self.__sum_t * self.__sum_u) / denominator
+            if slope > 0:
+                rate = slope
+
+        progress = None
+        eta_sec = None
+        if target > 0:
+            progress = min(1.0, updates / target)
+            if rate is not None:
+                eta_sec = max(0.0, (target - updates) / rate)
+
+        self.progress = self.__assemble_progress(mode, updates, target, progress, rate, eta_sec)
+
+    def get_progress(self) -> Mapping[str, Union[int, float, PositionMode, None]]:
+        return self.progress
+
+    # Private methods #
+
+    def __reset(self):
+        self.__t0 = None
+        self.__u0 = 0
+        self.__target = 0
+        self.__last_updates = 0
+        self.__n = 0
+        self.__sum_t = 0.0
+        self.__sum_u = 0.0
+        self.__sum_tt = 0.0
+        self.__sum_tu = 0.0
+
+    def __assemble_progress(self, mode, updates, target, progress, rate, eta_sec):
+        return MappingProxyType({
+            'mode': mode,
+            'position_updates': updates,
+            'target_updates': target,
+            'progress': progress,
+            'rate': rate,
+            'eta_sec': eta_sec
+        })
@@ -3,27 +3,55 @@ import logging
 from .serialthread import SerialThread
 from .receivers.gnss_receiver import GNSSReceiver
 from .receivers.hw_adapter_furuno import HwAdapterFuruno
+from .survey_progress import SurveyProgressEstimator
+from .query_scheduler import StatusQueryScheduler
+from .trace import TraceRing
+from .health_monitor import ExtSignalHealthMonitor
 
 from .common.enums import PositionMode
 
 
 class TimingGnss:
-    def __init__(self, port, baudrate):
+    def __init__(self, port, baudrate, status_queries=True, trace_size=256, trace_sample_every=0, on_ext_signal_health_change=None):
         self.ext_signal_enabled = False
         self.ext_signal_frequency_hz = 0
         self.ext_signal_duty = 50
         self.ext_signal_offset_to_pps = 0
+        # set by the reader thread: data is flowing (cleared on serial errors)
+        self.receiver_available = False
 
+        self.trace = TraceRing(trace_size, trace_sample_every)
         self.serial_thread = SerialThread(
-            port, baudrate, self.__new_message, self.__serial_thread_error)
+            port, baudrate, self.__new_message, self.__serial_thread_error, trace=self.trace)
         self.gnss = GNSSReceiver(self.write)
         self.gnss.add_adapter(HwAdapterFuruno())
 
+        self.survey_progress_estimator = SurveyProgressEstimator()
+        self.survey_progress_key = None
+
+        # expected ext signal settings are kept by the monitor as an immutable snapshot
+        self.ext_signal_health_monitor = ExtSignalHealthMonitor(on_ext_signal_health_change)
+        self.__update_expected_ext_signal()
+
+        # periodic status queries share TX budget with all other writes to the port
+        self.status_queries = status_queries
+        self.status_query_scheduler = StatusQueryScheduler(
+            baudrate, self.serial_thread.write, tx_ready_callback=lambda: self.serial_thread.is_connected)
+        self.status_query_scheduler.add_query(
+            'ext_signal', self.gnss.get_ext_signal_status_query_message,
+            lambda: self.gnss.get_ext_signal_snapshot()[0], min_interval_sec=1, max_interval_sec=60)
+        self.status_query_scheduler.add_query(
+            'version', self.gnss.get_version_query_message,
+            lambda: self.gnss.get_status()['version'], min_interval_sec=60, max_interval_sec=600)
+
     def __enter__(self):
         self.serial_thread.start()
+        if self.status_queries:
+            self.status_query_scheduler.start()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.status_query_scheduler.stop()
         self.serial_thread.join()
 
     def init(self):
@@ -31,6 +59,7 @@ class TimingGnss:
 
     def write(self, data):
         if len(data) > 0:
+            self.status_query_scheduler.account_tx(data)
             self.serial_thread.write(data)
 
     def status(self):
@@ -54,31 +83,72 @@ class TimingGnss:
     def in_precise_timing_mode(self) -> bool:
         return self.gnss.get_position_mode_status()['mode'] == PositionMode.TIME_ONLY
 
+    def trace_dump(self):
+        return self.trace.dump()
+
+    def ext_signal_health(self):
+        return self.ext_signal_health_monitor.get_health()
+
+    def ext_signal_health_statistics(self):
+        monitor = self.ext_signal_health_monitor
+        statistics = dict(monitor.get_statistics())
+        statistics['uptime_sec'] = monitor.get_uptime_sec()
+        statistics['outage_sec'] = monitor.get_outage_sec()
+        return statistics
+
+    def survey_progress(self):
+        return self.survey_progress_estimator.get_progress()
+
     def ext_signal_set(self, frequency=1000):
         self.ext_signal_frequency_hz = int(frequency)
         return self.ext_signal_enable()
 
     def ext_signal_enable(self):
+        # status is queried by the scheduler (if enabled) as soon as TX budget allows
         self.gnss.ext_signal_enable(
-            self.ext_signal_frequency_hz, self.ext_signal_duty, self.ext_signal_offset_to_pps)
+            self.ext_signal_frequency_hz, self.ext_signal_duty, self.ext_signal_offset_to_pps, query_status=not self.status_queries)
+        self.status_query_scheduler.expedite('ext_signal')
         self.ext_signal_enabled = True
+        self.__update_expected_ext_signal()
 
     def ext_signal_disable(self):
-        self.gnss.ext_signal_disable()
+        self.gnss.ext_signal_disable(query_status=not self.status_queries)
+        self.status_query_scheduler.expedite('ext_signal')
         self.ext_signal_enabled = False
+        self.__update_expected_ext_signal()
 
     def ext_signal_is_set(self):
-        status = self.gnss.get_ext_signal_status()
-        if status['enabled'] == self.ext_signal_enabled:
-            if status['frequency'] == self.ext_signal_frequency_hz:
-                if status['duty'] == self.ext_signal_duty:
-                    if status['offset'] == self.ext_signal_offset_to_pps:
-                        return True
-        return False
+        return self.gnss.get_ext_signal_status() == self.ext_signal_health_monitor.expected_ext_signal
 
     def __new_message(self, message):
         # possibly place for messages filtering and dispatching
+        self.receiver_available = True
         self.gnss.process(message)
+        if self.gnss.hw_detected:
+            self.__update_survey_progress()
+            self.ext_signal_health_monitor.update(
+                self.gnss.get_position_mode_status(), self.gnss.get_ext_signal_status())
+
+    def __update_expected_ext_signal(self):
+        self.ext_signal_health_monitor.set_expected_ext_signal(
+            self.ext_signal_enabled, self.ext_signal_frequency_hz, self.ext_signal_duty, self.ext_signal_offset_to_pps)
+
+    def __update_survey_progress(self):
+        # estimator is fed only when survey state really changed - snapshot version changes
+        # on fix-only updates as well and a repeated sample would pull the rate estimate down
+        position_mode = self.gnss.get_position_mode_status()
+        key = (position_mode['mode'], position_mode['position_updates'], position_mode['time_threshold'])
+        if key != self.survey_progress_key:
+            self.survey_progress_key = key
+            self.survey_progress_estimator.update(position_mode)
 
     def __serial_thread_error(self):
         logging.error('Serial thread error occured.')
+        # errors are reported on every failed re-open attempt - react on the first one only
+        if self.receiver_available:
+            self.receiver_available = False
+            self.ext_signal_health_monitor.mark_unavailable()
+            # last decoded data is stale - it's reported anew after reconnection
+            self.gnss.invalidate_data()
+            # refresh ext signal status as soon as the port is back
+            self.status_query_scheduler.expedite('ext_signal')
@@ -0,0 +1,87 @@
+from collections import deque
+import logging
+import time
+
+
+class TraceRing:
+    """
+    Fixed-size in-memory trace of serial traffic.
+
+    Keeps the most recent raw incoming lines, discarded (garbage) data and outgoing
+    commands. Recording is just an append to a bounded deque so it is cheap enough
+    to be done for every line; the trace is meant to be dumped on errors or on demand.
+    Optionally every N-th record is also logged (sampled logging) with structured data
+    attached to the log record (`trace` attribute).
+
+    Args:
+        size (int, optional): Number of records kept. Defaults to 256.
+        sample_every (int, optional): Log every N-th record (0 disables sampling). Defaults to 0.
+        sample_level (int, optional): Logging level of sampled records. Defaults to logging.DEBUG.
+
+    Attributes:
+        records (collections.deque): Recorded (timestamp, direction, data) tuples, oldest first.
+            Timestamp is time.monotonic() based, direction is one of RX, TX or GARBAGE.
+
+    """
+
+    RX = '<'
+    TX = '>'
+    GARBAGE = 'g'
+
+    def __init__(self, size=256, sample_every=0, sample_level=logging.DEBUG):
+        self.records = deque(maxlen=size)
+        self.sample_every = sample_every
+        self.sample_level = sample_level
+        self.sample_countdown = sample_every
+
+    def rx(self, data):
+        self.record(self.RX, data)
+
+    def tx(self, data):
+        self.record(self.TX, data)
+
+    def garbage(self, data):
+        self.record(self.GARBAGE, data)
+
+    def record(self, direction, data):
+        """
+        Add new record to the trace.
+
+        Args:
+            direction (str): Data direction (RX, TX or GARBAGE).
+            data (str): Raw data.
+
+        """
+        record = (time.monotonic(), direction, data)
+        self.records.append(record)
+        if self.sample_every:
+            self.sample_countdown -= 1
+            if self.sample_countdown <= 0:
+                self.sample_countdown = self.sample_every
+                self.__log(self.sample_level, record)
+
+    def dump(self):
+        """
+        Get a copy of the trace.
+
+        Returns:
+            list: Recorded (timestamp, direction, data) tuples, oldest first.
+
+        """
+        return list(self.records)
+
+    def log_dump(self, level=logging.ERROR):
+        """
+        Log the whole trace.
+
+        Args:
+            level (int, optional): Logging level. Defaults to logging.ERROR.
+
+        """
+        for record in self.dump():
+            self.__log(level, record)
+
+    def __log(self, level, record):
+        timestamp, direction, data = record
+        logging.log(level, '[trace %.3f] %s %s', timestamp, direction, data.rstrip(),
+                    extra={'trace': {'timestamp': timestamp, 'direction': direction, 'data': data}})